@@ -0,0 +1,498 @@
+"""
+benchmark.py
+
+This module times the weather data pipeline so that changes to the parser and calculator can be compared.
+
+Usage:
+- python benchmark.py <files_dir> [parse|workers|memory] [repeat]
+- python benchmark.py <files_dir> stages [repeat] [results.json]
+- python benchmark.py <files_dir> startup [repeat]
+- python benchmark.py <files_dir> archive [repeat]
+- python benchmark.py <files_dir> analytics [repeat]
+- python benchmark.py <files_dir> validation [repeat]
+- python benchmark.py compare <old_results.json> <new_results.json>
+
+Use synthetic_data.py to create a files_dir of any size.
+
+Functions:
+- time_call(function, repeat): Returns the best wall time of several calls to a function.
+- parse_file_iterrows(file_path): Parses a file one pandas row at a time, as WeatherParser.parse_file originally did.
+- benchmark_parse(files_dir, repeat): Compares the original iterrows parse with the row-wise and columnar parse paths
+  over every year in files_dir.
+- benchmark_workers(files_dir, repeat): Times year-wise parsing for growing file and worker counts.
+- benchmark_memory(files_dir): Measures memory and time of loading the whole archive as WeatherData objects and as
+  WeatherDataBatch arrays.
+- benchmark_stages(files_dir, repeat): Times the parse, calculate and report stages of the -e, -a and -c commands.
+- benchmark_startup(files_dir, repeat): Times whole weatherman.py processes for a validation error, a cached query and
+  an uncached query.
+- calculate_all_results(parser, index): Returns the results of every command for every year and month of an index.
+- benchmark_archive(files_dir, repeat): Compares year-wise reads of the CSV files and of a memory-mapped archive, and
+  checks that both give the same results.
+- benchmark_analytics(files_dir, repeat): Times each vectorized statistic over the whole archive.
+- benchmark_validation(files_dir, repeat): Compares parsing the files as they are and with one row in ten corrupted.
+- compare_results(old_results, new_results): Lists the change of every stage timing between two saved runs.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from constants import MEASUREMENT_COLUMNS
+from weather_archive import WeatherArchive
+from weather_calculator import WeatherCalculator
+from weather_data import WeatherData, WeatherDataBatch
+from weather_index import WeatherFileIndex
+from weather_parser import WeatherParser
+from weather_reports import WeatherReport
+from weather_validation import WeatherValidator
+
+
+def time_call(function, repeat):
+    """
+    Returns the best wall time of several calls to a function.
+
+    Args:
+        function (callable): Function to be timed, called without arguments.
+        repeat (int): Number of calls.
+
+    Returns:
+        float: The fastest call in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def parse_file_iterrows(file_path):
+    """
+    Parses a weather data file the way WeatherParser.parse_file did before the columnar paths: the whole file is read
+    by pandas, rows with a missing value are dropped, and every remaining row becomes a WeatherData object. Kept
+    here as the fixed baseline of benchmark_parse, since the parser's own row-wise path is now columnar too.
+
+    Args:
+        file_path (str): Path to the CSV file containing weather data.
+
+    Returns:
+        list: WeatherData objects of the valid rows.
+    """
+    import pandas as pd
+
+    readings = []
+    data = pd.read_csv(file_path)
+    data.columns = data.columns.str.strip()
+    date_col = "PKT" if "PKT" in data.columns else "PKST"
+    data = data[[date_col, *MEASUREMENT_COLUMNS]].dropna()
+    for _, row in data.iterrows():
+        try:
+            readings.append(WeatherData(datetime.strptime(row[date_col], "%Y-%m-%d"),
+                                        *(float(row[column]) for column in MEASUREMENT_COLUMNS)))
+        except ValueError:
+            continue
+    return readings
+
+
+def benchmark_parse(files_dir, repeat=3):
+    """
+    Compares the original iterrows parse with the row-wise path, which turns columnar batches into WeatherData
+    objects, and the columnar path, over every year in files_dir.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per path; the fastest one is reported.
+
+    Returns:
+        dict: Best wall time in seconds for the 'iterrows', 'row' and 'columnar' paths.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    years = sorted({year for year, month in index.entries})
+    parsers = {name: WeatherParser(files_dir, columnar=columnar, index=index, validator=WeatherValidator(report=False))
+               for name, columnar in (("row", False), ("columnar", True))}
+    parse_year = {
+        "iterrows": lambda year: [reading for file_path in index.files_for_year(year)
+                                  for reading in parse_file_iterrows(file_path)],
+        "row": parsers["row"].parse_files_year_wise,
+        "columnar": parsers["columnar"].parse_files_year_wise,
+    }
+    timings = {}
+    for name, parse in parse_year.items():
+
+        def parse_all_years():
+            for year in years:
+                WeatherCalculator(parse(year)).calculate_yearly_extremes(year)
+
+        timings[name] = time_call(parse_all_years, repeat)
+    return timings
+
+
+def benchmark_workers(files_dir, repeat=3):
+    """
+    Times year-wise columnar parsing for growing numbers of years (12 files each) and worker processes.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per combination; the fastest one is reported.
+
+    Returns:
+        dict: Dictionary mapping (file count, workers) tuples to the best wall time in seconds.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    years = sorted({year for year, month in index.entries})
+    year_counts = sorted({1, min(4, len(years)), len(years)})
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    timings = {}
+    for year_count in year_counts:
+        selected_years = years[:year_count]
+        file_count = sum(len(index.files_for_year(year)) for year in selected_years)
+        for workers in worker_counts:
+            parser = WeatherParser(files_dir, columnar=True, index=index, workers=workers)
+
+            def parse_selected_years():
+                for year in selected_years:
+                    parser.parse_files_year_wise(year)
+
+            timings[(file_count, workers)] = time_call(parse_selected_years, repeat)
+    return timings
+
+
+def benchmark_memory(files_dir):
+    """
+    Measures the memory held by, and the time taken for, loading every file in files_dir as a list of WeatherData
+    objects and as one WeatherDataBatch.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+
+    Returns:
+        dict: Dictionary mapping each representation to its reading count, bytes held and seconds taken.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    years = sorted({year for year, month in index.entries})
+    results = {}
+    for name, columnar in (("objects", False), ("batch", True)):
+        parser = WeatherParser(files_dir, columnar=columnar, index=index)
+        tracemalloc.start()
+        start = time.perf_counter()
+        readings = [parser.parse_files_year_wise(year) for year in years]
+        seconds = time.perf_counter() - start
+        held_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            "readings": sum(len(year_readings) for year_readings in readings),
+            "bytes": held_bytes,
+            "seconds": seconds,
+        }
+        del readings
+    return results
+
+
+def benchmark_stages(files_dir, repeat=3):
+    """
+    Times the parse, calculate and report stages separately for each command. -e runs once per year, -a and -c
+    once per month; the parser has no cache or store, so every run reads the CSV files.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per stage; the fastest one is reported.
+
+    Returns:
+        dict: Dictionary mapping each command to the best wall time in seconds of its parse, calculate and report
+        stages.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    months = sorted(index.entries)
+    years = sorted({year for year, month in months})
+    parser = WeatherParser(files_dir, columnar=True, index=index)
+    commands = {
+        "-e": ([(year,) for year in years], parser.parse_files_year_wise,
+               lambda data, year: WeatherCalculator(data).calculate_yearly_extremes(year),
+               lambda results, year: WeatherReport(results).generate_extreme_weather_yearly_report()),
+        "-a": (months, parser.parse_files_month_wise,
+               lambda data, year, month: WeatherCalculator(data).calculate_monthly_averages(year, month),
+               lambda results, year, month: WeatherReport(results).generate_average_weather_yearly_report()),
+        "-c": (months, parser.parse_files_month_wise,
+               lambda data, year, month: WeatherCalculator(data).calculate_daily_temperatures(year, month),
+               lambda results, year, month: WeatherReport(results).generate_daily_temperatures_report(year, month)),
+    }
+
+    timings = {}
+    for command, (periods, parse, calculate, report) in commands.items():
+        parsed = [parse(*period) for period in periods]
+        calculated = [calculate(data, *period) for data, period in zip(parsed, periods)]
+        timings[command] = {
+            "parse": time_call(lambda: [parse(*period) for period in periods], repeat),
+            "calculate": time_call(lambda: [calculate(data, *period) for data, period in zip(parsed, periods)],
+                                   repeat),
+            "report": time_call(lambda: [report(results, *period) for results, period in zip(calculated, periods)],
+                                repeat),
+        }
+    return timings
+
+
+def benchmark_startup(files_dir, repeat=3):
+    """
+    Times whole weatherman.py processes, so import and startup costs are included. The cached query is run once
+    beforehand to fill the cache, index and summary table.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per scenario; the fastest one is reported.
+
+    Returns:
+        dict: Dictionary mapping each scenario to the best wall time in seconds and whether pandas was imported.
+    """
+    year, month = min(WeatherFileIndex.build(files_dir).entries)
+    weatherman = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weatherman.py")
+    scenarios = {
+        "invalid": [files_dir, "-e", "0"],
+        "cached": [files_dir, "-e", str(year), "-a", f"{year}/{month}"],
+        "uncached": ["--no-cache", files_dir, "-e", str(year), "-a", f"{year}/{month}"],
+    }
+    probe = "import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path(sys.argv[0], run_name='__main__'); " \
+            "print('pandas' in sys.modules, file=sys.stderr)"
+    subprocess.run([sys.executable, weatherman] + scenarios["cached"], capture_output=True, check=True)
+
+    results = {}
+    for name, args in scenarios.items():
+        completed = subprocess.run([sys.executable, "-c", probe, weatherman] + args, capture_output=True, text=True)
+        results[name] = {
+            "seconds": time_call(lambda: subprocess.run([sys.executable, weatherman] + args, capture_output=True),
+                                 repeat),
+            "pandas": completed.stderr.strip().endswith("True"),
+        }
+    return results
+
+
+def calculate_all_results(parser, index):
+    """
+    Returns the results of the -e, -a and -c calculations for every year and month of an index, so the results of
+    two parsers can be compared.
+
+    Args:
+        parser (WeatherParser): Parser reading the readings.
+        index (WeatherFileIndex): Index of the files directory.
+
+    Returns:
+        list: The results, in year and month order.
+    """
+    results = []
+    for year in sorted({year for year, month in index.entries}):
+        results.append(WeatherCalculator(parser.parse_files_year_wise(year)).calculate_yearly_extremes(year))
+    for year, month in sorted(index.entries):
+        results.append(WeatherCalculator(parser.parse_files_month_wise(year, month)).calculate_monthly_averages(
+            year, month))
+        results.append(WeatherCalculator(parser.parse_files_month_wise(year, month)).calculate_daily_temperatures(
+            year, month))
+    return results
+
+
+def benchmark_archive(files_dir, repeat=3):
+    """
+    Compares computing the extremes of every year from the CSV files and from a memory-mapped archive of them,
+    written to a temporary directory first. The results of every command for every year and month are then
+    computed from both sources, which must be identical.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per source; the fastest one is reported.
+
+    Returns:
+        dict: Best wall time in seconds for each source, the seconds taken to write the archive, and under
+        'identical' whether both sources gave the same results.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    years = sorted({year for year, month in index.entries})
+    with tempfile.TemporaryDirectory() as archive_dir:
+        start = time.perf_counter()
+        archive = WeatherArchive.build(WeatherParser(files_dir, columnar=True, index=index,
+                                                     validator=WeatherValidator(report=False)),
+                                       os.path.join(archive_dir, "archive"))
+        timings = {"build": time.perf_counter() - start}
+        results = {}
+        for name, source_archive in (("csv", None), ("archive", archive)):
+            parser = WeatherParser(files_dir, columnar=True, index=index, archive=source_archive,
+                                   validator=WeatherValidator(report=False))
+
+            def calculate_all_years(parser=parser):
+                for year in years:
+                    WeatherCalculator(parser.parse_files_year_wise(year)).calculate_yearly_extremes(year)
+
+            timings[name] = time_call(calculate_all_years, repeat)
+            results[name] = calculate_all_results(parser, index)
+        del archive
+    timings["identical"] = results["csv"] == results["archive"]
+    return timings
+
+
+def benchmark_analytics(files_dir, repeat=3):
+    """
+    Times each vectorized statistic of WeatherCalculator over every reading in files_dir, parsed once beforehand.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per statistic; the fastest one is reported.
+
+    Returns:
+        dict: Best wall time in seconds for each statistic.
+    """
+    index = WeatherFileIndex.build(files_dir)
+    parser = WeatherParser(files_dir, columnar=True, index=index)
+    weather_data = WeatherDataBatch.concatenate([parser.parse_files_year_wise(year)
+                                                 for year in sorted({year for year, month in index.entries})])
+    weather_calculator = WeatherCalculator(weather_data)
+    return {
+        "rolling": time_call(lambda: weather_calculator.calculate_rolling_means("max_temperature", 7), repeat),
+        "percentiles": time_call(lambda: weather_calculator.calculate_monthly_percentiles("max_temperature"), repeat),
+        "anomalies": time_call(lambda: weather_calculator.calculate_anomalies("max_temperature"), repeat),
+        "heat_waves": time_call(lambda: weather_calculator.calculate_heat_waves(40.0, 3), repeat),
+    }
+
+
+def benchmark_validation(files_dir, repeat=3):
+    """
+    Compares parsing every file in files_dir as it is and after one data row in ten had a measurement blanked or
+    replaced by text, so the cost of rejecting bad rows can be seen.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        repeat (int): Number of runs per case; the fastest one is reported.
+
+    Returns:
+        dict: Best wall time in seconds and number of rejected rows for the 'clean' and 'dirty' files.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as dirty_dir:
+        for filename in os.listdir(files_dir):
+            with open(os.path.join(files_dir, filename)) as source, \
+                    open(os.path.join(dirty_dir, filename), "w") as target:
+                for line_number, line in enumerate(source):
+                    if line_number and line_number % 10 == 0:
+                        values = line.split(",")
+                        values[line_number % 3 + 1] = "" if line_number % 20 else "n/a"
+                        line = ",".join(values)
+                    target.write(line)
+
+        for name, directory in (("clean", files_dir), ("dirty", dirty_dir)):
+            index = WeatherFileIndex.build(directory)
+            file_paths = [file_path for year_month in sorted(index.entries)
+                          for file_path in index.files_for_month(*year_month)]
+            validator = WeatherValidator(report=False)
+            parser = WeatherParser(directory, columnar=True, index=index, validator=validator)
+            seconds = time_call(lambda: [parser.parse_file_columnar(file_path) for file_path in file_paths], repeat)
+            results[name] = {"seconds": seconds,
+                             "rejected": sum(counts["rejected"] for counts in validator.files.values())}
+    return results
+
+
+def compare_results(old_results, new_results):
+    """
+    Lists the change of every stage timing between two saved runs of benchmark_stages.
+
+    Args:
+        old_results (dict): Results saved by an earlier run.
+        new_results (dict): Results saved by a later run.
+
+    Returns:
+        list: (command, stage, old seconds, new seconds, ratio) tuples for the stages present in both runs.
+    """
+    comparison = []
+    for command, stages in new_results.get("timings", {}).items():
+        for stage, seconds in stages.items():
+            old_seconds = old_results.get("timings", {}).get(command, {}).get(stage)
+            if old_seconds:
+                comparison.append((command, stage, old_seconds, seconds, seconds / old_seconds))
+    return comparison
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: benchmark.py /path/to/files-dir "
+              "[parse|workers|memory|stages|startup|archive|analytics|validation] [repeat] [results.json]\n"
+              "       benchmark.py compare old_results.json new_results.json")
+        return
+    if sys.argv[1] == "compare":
+        with open(sys.argv[2]) as old_file, open(sys.argv[3]) as new_file:
+            comparison = compare_results(json.load(old_file), json.load(new_file))
+        print(f"{'command':>8} {'stage':>10} {'old':>8} {'new':>8} {'ratio':>7}")
+        for command, stage, old_seconds, new_seconds, ratio in comparison:
+            print(f"{command:>8} {stage:>10} {old_seconds:>8.3f} {new_seconds:>8.3f} {ratio:>6.2f}x")
+        return
+
+    files_dir = sys.argv[1]
+    mode = sys.argv[2] if len(sys.argv) > 2 else "parse"
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    if mode == "workers":
+        timings = benchmark_workers(files_dir, repeat)
+        print(f"{'files':>6} {'workers':>8} {'seconds':>8} {'speedup':>8}")
+        for (file_count, workers), seconds in timings.items():
+            speedup = timings[(file_count, 1)] / seconds
+            print(f"{file_count:>6} {workers:>8} {seconds:>8.3f} {speedup:>7.1f}x")
+        return
+
+    if mode == "stages":
+        timings = benchmark_stages(files_dir, repeat)
+        print(f"{'command':>8} {'parse':>8} {'calculate':>10} {'report':>8}")
+        for command, stages in timings.items():
+            print(f"{command:>8} {stages['parse']:>8.3f} {stages['calculate']:>10.3f} {stages['report']:>8.3f}")
+        if len(sys.argv) > 4:
+            results = {
+                "files_dir": os.path.abspath(files_dir),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "repeat": repeat,
+                "timings": timings,
+            }
+            with open(sys.argv[4], "w") as results_file:
+                json.dump(results, results_file, indent=2)
+        return
+
+    if mode == "startup":
+        print(f"{'scenario':>10} {'seconds':>8} {'pandas':>7}")
+        for name, result in benchmark_startup(files_dir, repeat).items():
+            print(f"{name:>10} {result['seconds']:>8.3f} {str(result['pandas']):>7}")
+        return
+
+    if mode == "analytics":
+        for name, seconds in benchmark_analytics(files_dir, repeat).items():
+            print(f"{name:>12}: {seconds:.4f}s")
+        return
+
+    if mode == "validation":
+        for name, result in benchmark_validation(files_dir, repeat).items():
+            print(f"{name:>10}: {result['seconds']:.3f}s, {result['rejected']} rows rejected")
+        return
+
+    if mode == "archive":
+        timings = benchmark_archive(files_dir, repeat)
+        identical = timings.pop("identical")
+        for name, seconds in timings.items():
+            print(f"{name:>10}: {seconds:.3f}s")
+        print(f"{'identical':>10}: {identical}")
+        if not identical:
+            sys.exit("The archive gives different results from the CSV files")
+        return
+
+    if mode == "memory":
+        for name, result in benchmark_memory(files_dir).items():
+            bytes_per_reading = result["bytes"] / max(result["readings"], 1)
+            print(f"{name:>10}: {result['readings']} readings, {result['bytes'] / 1024:.0f} KiB "
+                  f"({bytes_per_reading:.0f} B/reading), {result['seconds']:.3f}s")
+        return
+
+    timings = benchmark_parse(files_dir, repeat)
+    for name, seconds in timings.items():
+        print(f"{name:>10}: {seconds:.3f}s")
+    print(f"{'speedup':>10}: {timings['iterrows'] / timings['columnar']:.1f}x over iterrows")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,32 @@ This module defines utility constants  for weather data processing.
 
 Constants:
 - MONTH_MAP (dict): A dictionary mapping month numbers (1-12) to their corresponding three-letter abbreviation.
+- MONTH_NUMBERS (dict): A dictionary mapping three-letter month abbreviations to their month numbers (1-12).
 - COLORS (dict): A dictionary mapping color names to ANSI escape sequences for colored output.
 - EXPECTED_NUMBER_OF_ARGS (int): The expected number of command line arguments for the weatherman script.
 - COMMANDS (dict): A dictionary mapping strings to commands.
 - MESSAGES (dict): A dictionary mapping error to messages
+- OPTIONS (dict): A dictionary mapping command line flags to the option name they set, whether they take a value and
+  the values they accept.
+- CACHE_DIR (str): The directory where parsed weather data files, file indexes, summary tables and archives are
+  cached.
+- DEFAULT_STATION (str): The station whose files are read when no --station is given.
+- STATION_FILE_INFIX (str): The text between the station and the year in a weather data file name.
+- FILE_PREFIX (str): The prefix of every weather data file name of the default station.
+- STORE_MEMORY_CAP_MB (int): The default memory cap, in megabytes, of the in-memory store of parsed files.
+- DATE_COLUMNS (tuple): The names the date column of a weather data file can have.
+- MEASUREMENT_COLUMNS (tuple): The measurement columns read from weather data files, in WeatherData order.
+- CSV_FAST_PATH_MAX_BYTES (int): The largest file, in bytes, parsed with the csv module instead of pandas.
+- CSV_CHUNK_ROWS (int): The number of CSV rows read at a time when a file is streamed in chunks.
+- SERVER_HOST (str): The address the query server listens on.
+- SERVER_PORT (int): The default TCP port of the query server.
+- SERVER_RELOAD_INTERVAL_SECONDS (float): How often the query server checks the files directory for changes.
+- SERVER_CONTENT_TYPES (dict): A dictionary mapping the formats the query server accepts in its format parameter to
+  the Content-Type of their responses.
 """
 
+import os
+
 EXPECTED_NUMBER_OF_ARGS = 4
 
 COMMANDS = {
@@ -22,11 +42,83 @@ MESSAGES = {
     'error_for_year': "Error: Year must be between 1996 and 2011",
     'error_for_date': "Error: Year must be between 1996 and 2011 Year and Month must be between 01 and 12. Plz "
                       "provide them in YYYY/MM format after command",
-    "usage": "Usage: weatherman.py /path/to/files-dir -e 2002 or -a 2002/3 or -c 2002/12",
+    "usage": "Usage: weatherman.py /path/to/files-dir -e 2002 or -a 2002/3 or -c 2002/12, or a range such as "
+             "-e 1996:2011 or -a 2002/3:2003/2 "
+             "[--no-cache] [--clear-cache] [--memory-cap MB] [--workers N] [--ingest] [--build-archive] "
+             "[--station NAME[,NAME...]|all] [--profile] [--profile-json PATH] [--format text|json|csv|arrow] "
+             "[--quarantine PATH], "
+             "or weatherman.py /path/to/files-dir --serve [--port N] [--socket PATH]",
     "file_error": "Error:  is not a valid directory",
     "invalid": "Invalid option",
     "invalid_command": "Invalid command",
     "valid": "validated",
+    "error_for_range": "Error: the start of a range must not be after its end",
+    "missing_value": "Error: option requires a value",
+    "invalid_value": "Error: option value must be a positive number",
+    "invalid_choice": "Error: option value must be one of {choices}",
+    "missing_dependency": "Error: {feature} requires the {package} package",
+    "cache_cleared": "Cache cleared",
+    "ingested": "Ingested {parsed_files} new or changed files: {rebuilt_months} months rebuilt, {dropped_months} "
+                "months dropped",
+    "archived": "Archived {readings} readings of {months} months to {path}",
+    "station": "Station: {station}",
+    "single_station": "Error: --serve takes a single station",
+    "serving": "Serving {files_dir} on {address}",
+    "server_stopped": "Server stopped",
+    "rejected_rows": "{file}: rejected {rejected} of {rows} rows ({details})",
+}
+
+OPTIONS = {
+    "--no-cache": {"name": "no_cache", "takes_value": False},
+    "--clear-cache": {"name": "clear_cache", "takes_value": False},
+    "--memory-cap": {"name": "memory_cap", "takes_value": True, "type": int},
+    "--workers": {"name": "workers", "takes_value": True, "type": int},
+    "--ingest": {"name": "ingest", "takes_value": False},
+    "--build-archive": {"name": "build_archive", "takes_value": False},
+    "--profile": {"name": "profile", "takes_value": False},
+    "--profile-json": {"name": "profile_json", "takes_value": True},
+    "--serve": {"name": "serve", "takes_value": False},
+    "--port": {"name": "port", "takes_value": True, "type": int},
+    "--socket": {"name": "socket", "takes_value": True},
+    "--station": {"name": "station", "takes_value": True},
+    "--quarantine": {"name": "quarantine", "takes_value": True},
+    "--format": {"name": "format", "takes_value": True, "choices": ("text", "json", "csv", "arrow")},
+}
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "weatherman")
+
+DEFAULT_STATION = "lahore"
+
+STATION_FILE_INFIX = "_weather_"
+
+FILE_PREFIX = f"{DEFAULT_STATION}{STATION_FILE_INFIX}"
+
+STORE_MEMORY_CAP_MB = 256
+
+DATE_COLUMNS = ("PKT", "PKST")
+
+MEASUREMENT_COLUMNS = (
+    "Max TemperatureC",
+    "Mean TemperatureC",
+    "Min TemperatureC",
+    "Max Humidity",
+    "Mean Humidity",
+    "Min Humidity",
+)
+
+CSV_FAST_PATH_MAX_BYTES = 256 * 1024
+
+CSV_CHUNK_ROWS = 50_000
+
+SERVER_HOST = "127.0.0.1"
+
+SERVER_PORT = 8765
+
+SERVER_RELOAD_INTERVAL_SECONDS = 2.0
+
+SERVER_CONTENT_TYPES = {
+    "json": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
 }
 
 MONTH_MAP = {
@@ -44,6 +136,8 @@ MONTH_MAP = {
     12: 'Dec'
 }
 
+MONTH_NUMBERS = {abbreviation: number for number, abbreviation in MONTH_MAP.items()}
+
 COLORS = {
     "red": "\033[31m",
     "blue": "\033[34m",
@@ -5,6 +5,9 @@ This module defines the InputParsing class, which parses and validates command l
 
 classes:
 - InputParsing: A class to parse and validate command line arguments for the weatherman script.
+
+functions:
+- months_in_period(period): Lists the (year, month) tuples covered by a validated year, date or range.
 """
 
 import os
@@ -12,7 +15,7 @@ import re
 
 from collections import defaultdict
 
-from constants import EXPECTED_NUMBER_OF_ARGS, MESSAGES
+from constants import EXPECTED_NUMBER_OF_ARGS, MESSAGES, OPTIONS
 
 
 class InputParsing:
@@ -25,9 +28,64 @@ class InputParsing:
 
         self.input_args = input_args
 
+    def validate_options(self):
+        """
+        The function takes the --flag options out of the command line arguments and validates them.
+        Flags may appear anywhere after the script name; the remaining arguments are kept in self.input_args.
+        Returns:
+            A dictionary containing a boolean value indicating whether the options are valid, a message explaining the
+            result, and a dictionary of the options that were given.
+        """
+        result = {
+            'is_valid': False,
+            'message': '',
+            'options': {},
+        }
+        options = {}
+        remaining_args = []
+        index = 0
+        while index < len(self.input_args):
+            argument = self.input_args[index]
+            if not argument.startswith('--'):
+                remaining_args.append(argument)
+                index += 1
+                continue
+
+            option = OPTIONS.get(argument)
+            if option is None:
+                result['message'] = MESSAGES.get("invalid")
+                return result
+            if option.get("takes_value"):
+                if index + 1 >= len(self.input_args):
+                    result['message'] = MESSAGES.get("missing_value")
+                    return result
+                value = self.input_args[index + 1]
+                if option.get("type"):
+                    try:
+                        value = option.get("type")(value)
+                    except ValueError:
+                        value = 0
+                    if value <= 0:
+                        result['message'] = MESSAGES.get("invalid_value")
+                        return result
+                if option.get("choices") and value not in option.get("choices"):
+                    result['message'] = MESSAGES.get("invalid_choice").format(choices=", ".join(option.get("choices")))
+                    return result
+                options[option.get("name")] = value
+                index += 2
+            else:
+                options[option.get("name")] = True
+                index += 1
+
+        self.input_args = remaining_args
+        result['is_valid'] = True
+        result['message'] = MESSAGES.get("valid")
+        result['options'] = options
+        return result
+
     def validate_year(self, year):
         """
-        The function validates the year.
+        The function validates the year, or a range of years written as START:END.
         Args:
             year: The year to be validated.
         Returns:
@@ -38,10 +96,14 @@ class InputParsing:
             'message': '',
         }
         year_pattern = re.compile(r"^(199[6-9]|200[0-9]|2010|2011)$")
-        if not year_pattern.match(year):
+        years = year.split(':')
+        if len(years) > 2 or not all(year_pattern.match(part) for part in years):
             message = MESSAGES.get("error_for_year")
             result['message'] = message
-            return result, message
+            return result
+        if int(years[0]) > int(years[-1]):
+            result['message'] = MESSAGES.get("error_for_range")
+            return result
         result['is_valid'] = True
         result['message'] = MESSAGES.get("valid")
         return result
@@ -49,7 +111,7 @@ class InputParsing:
 
     def validate_date(self, date):
         """
-        The function validates the date.
+        The function validates the date, or a range of dates written as START:END.
         Args:
             date: The date to be validated.
         Returns:
@@ -60,10 +122,15 @@ class InputParsing:
             'message': '',
         }
         year_month_pattern = re.compile(r"^(199[6-9]|200[0-9]|2010|2011)/([1-9]|0[1-9]|1[0-2])$")
-        if not year_month_pattern.match(date):
+        dates = date.split(':')
+        if len(dates) > 2 or not all(year_month_pattern.match(part) for part in dates):
             message = MESSAGES.get("error_for_date")
             result['message'] = message
             return result
+        start, end = (tuple(map(int, part.split('/'))) for part in (dates[0], dates[-1]))
+        if start > end:
+            result['message'] = MESSAGES.get("error_for_range")
+            return result
         result['is_valid'] = True
         result['message'] = MESSAGES.get("valid")
         return result
@@ -171,3 +238,20 @@ class InputParsing:
         result['message'] = MESSAGES.get("valid")
         result['input_arguments'] = input_arguments
         return result
+
+
+def months_in_period(period):
+    """
+    The function lists the months covered by a validated command argument: a year ('2005'), a date ('2005/6') or a
+    range of either ('1996:2011', '2005/1:2006/6').
+    Args:
+        period: The validated command argument.
+    Returns:
+        A list of (year, month) tuples in calendar order.
+    """
+    bounds = period.split(':')
+    start, end = bounds[0], bounds[-1]
+    start_year, start_month = (int(start), 1) if '/' not in start else map(int, start.split('/'))
+    end_year, end_month = (int(end), 12) if '/' not in end else map(int, end.split('/'))
+    return [(year, month) for year in range(start_year, end_year + 1) for month in range(1, 13)
+            if (start_year, start_month) <= (year, month) <= (end_year, end_month)]
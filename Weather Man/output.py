@@ -8,13 +8,47 @@ Classes:
 - OutputResults: Handles input arguments, validates commands, parses weather data,
   calculates metrics, generates reports, and prints them.
 
+Functions:
+- run_station(input_args): Runs weatherman.py for one station of a multi-station run and captures its output.
+
+The modules that pull in NumPy are imported only once the arguments are valid, so usage and validation errors are
+reported without loading them. pandas itself is only imported by WeatherParser when a large CSV has to be read.
 """
 
-from constants import COMMANDS, MESSAGES
-from input_parsing import InputParsing
-from weather_parser import WeatherParser
+import calendar
+import importlib.util
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import (CACHE_DIR, COMMANDS, DEFAULT_STATION, MESSAGES, SERVER_HOST, SERVER_PORT,
+                       STORE_MEMORY_CAP_MB)
+from input_parsing import InputParsing, months_in_period
+from weather_cache import WeatherCache
+from weather_formats import WeatherResultWriter
+from weather_index import WeatherFileIndex, discover_stations
+from weather_profiler import WeatherProfiler, profile_stage
 from weather_reports import WeatherReport
-from weather_calculator import WeatherCalculator
+from weather_store import WeatherReadingStore
+
+
+def run_station(input_args):
+    """
+    Runs weatherman.py for a single station and captures what it prints. Used by the worker processes of a
+    multi-station run.
+
+    Args:
+        input_args (list): Input arguments naming a single station with --station.
+
+    Returns:
+        tuple: The printed output as bytes, since --format arrow writes binary output, and the returned message, or
+        None.
+    """
+    stream = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", newline="")
+    message = OutputResults(input_args, stream=stream).output()
+    stream.flush()
+    return stream.buffer.getvalue(), message
 
 
 class OutputResults:
@@ -24,6 +58,12 @@ class OutputResults:
 
     Attributes:
         input_args (list): List of input arguments passed to the program.
+        profiler (WeatherProfiler): Profiler recording the stages of each command when --profile or --profile-json
+                                    is given, otherwise None.
+        summary_table (WeatherSummaryTable): Summary table of an already loaded archive to run the commands against,
+                                             or None to load the archive named in the arguments.
+        stream (file): Stream the reports are printed to, or None for standard output.
+        station (str): The station whose files are read.
 
     Methods:
         output():
@@ -31,14 +71,21 @@ class OutputResults:
             generates weather reports, and prints them to standard output.
     """
 
-    def __init__(self, input_args):
+    def __init__(self, input_args, summary_table=None, stream=None):
         """
         Initializes an OutputResults instance.
 
         Args:
             input_args (list): List of input arguments passed to the program.
+            summary_table (WeatherSummaryTable): Summary table of an already loaded archive, as kept by the query
+                                                 server.
+            stream (file): Stream the reports are printed to instead of standard output.
         """
         self.input_args = input_args
+        self.profiler = None
+        self.summary_table = summary_table
+        self.stream = stream
+        self.station = DEFAULT_STATION
 
     def output(self):
         """
@@ -46,14 +93,282 @@ class OutputResults:
         generates reports based on specified commands, and prints them to standard output.
         """
         input_parser = InputParsing(self.input_args)
+        options_result = input_parser.validate_options()
+        if not options_result.get("is_valid"):
+            return options_result.get("message")
+        options = options_result.get("options")
+        stations = options.get("station", DEFAULT_STATION).split(",")
+        if stations == ["all"] and len(input_parser.input_args) > 1:
+            validation_result = input_parser.validate_file({"files_dir": input_parser.input_args[1]})
+            if not validation_result.get("is_valid"):
+                return validation_result.get("message")
+            stations = discover_stations(input_parser.input_args[1])
+        if not all(stations):
+            return MESSAGES.get("invalid_value")
+        if len(stations) > 1:
+            return self.__run_stations(stations, options)
+        self.station = stations[0]
+
+        if options.get("profile") or options.get("profile_json"):
+            self.profiler = WeatherProfiler()
+
+        cache = WeatherCache(CACHE_DIR)
+        if options.get("clear_cache"):
+            cache.clear()
+            if len(input_parser.input_args) <= 2:
+                return MESSAGES.get("cache_cleared")
+        if options.get("no_cache"):
+            cache = None
+
+        if options.get("serve"):
+            return self.__serve(input_parser, cache, options)
+
+        if options.get("build_archive"):
+            return self.__build_archive(input_parser, options)
+
+        if options.get("ingest") and len(input_parser.input_args) == 2:
+            files_dir = input_parser.input_args[1]
+            validation_result = input_parser.validate_file({"files_dir": files_dir})
+            if not validation_result.get("is_valid"):
+                return validation_result.get("message")
+            return self.__ingest(self.__build_summary_table(files_dir, cache, options))
+
         validation_result = input_parser.validate_args()
 
         if not validation_result.get("is_valid"):
             return validation_result.get("message")
         files_dir = validation_result["input_arguments"].get("files_dir")
-        commands = self.input_args[2:]
+        commands = input_parser.input_args[2:]
         input_args = validation_result["input_arguments"]
 
+        summary_table = self.summary_table
+        if summary_table is None:
+            summary_table = self.__build_summary_table(files_dir, cache, options)
+        if options.get("format") == "arrow" and importlib.util.find_spec("pyarrow") is None:
+            return MESSAGES.get("missing_dependency").format(feature="--format arrow", package="pyarrow")
+        if options.get("ingest"):
+            print(self.__ingest(summary_table), file=self.stream)
+
+        writer = None
+        if options.get("format", "text") != "text":
+            writer = WeatherResultWriter(self.stream or sys.stdout, options.get("format"), self.station)
+        try:
+            message = self.__run_commands(input_parser, input_args, commands, summary_table, writer)
+        finally:
+            if writer is not None:
+                writer.close()
+        summary_table.save()
+        self.__report_profile(options)
+        return message
+
+    def __run_stations(self, stations, options):
+        """
+        Runs the same arguments for several stations at once, one worker process per station, and prints the output
+        of each station in the order the stations were given. Text reports are printed under the station name; the
+        machine-readable formats carry the station in every row and are joined into a single document.
+
+        Args:
+            stations (list): Names of the stations.
+            options (dict): Validated command line options.
+
+        Returns:
+            str: An error message when the stations cannot be run together, otherwise None.
+        """
+        if options.get("serve"):
+            return MESSAGES.get("single_station")
+        station_position = self.input_args.index("--station") + 1
+        station_args = [self.input_args[:station_position] + [station] + self.input_args[station_position + 1:]
+                        for station in stations]
+        with ProcessPoolExecutor(max_workers=min(len(stations), os.cpu_count() or 1)) as executor:
+            station_results = list(executor.map(run_station, station_args))
+
+        stream = self.stream or sys.stdout
+        output_format = options.get("format", "text")
+        if output_format == "arrow":
+            return self.__join_arrow_streams(stream, station_results)
+        for position, (station, (output, message)) in enumerate(zip(stations, station_results)):
+            output = output.decode("utf-8")
+            if output_format == "text":
+                stream.write(MESSAGES.get("station").format(station=station) + "\n")
+            elif output_format == "csv" and position:
+                output = output.partition("\n")[2]
+            stream.write(output)
+            if message:
+                stream.write(f"{message}\n")
+        return None
+
+    @staticmethod
+    def __join_arrow_streams(stream, station_results):
+        """
+        Writes the record batches of the Arrow IPC streams of several stations as one stream.
+
+        Args:
+            stream (file): Text stream whose binary buffer receives the joined stream.
+            station_results (list): (output, message) tuples returned by run_station.
+
+        Returns:
+            str: The first error message of a station, or None.
+        """
+        import pyarrow as pa
+
+        messages = [message for output, message in station_results if message]
+        readers = [pa.ipc.open_stream(output) for output, message in station_results if not message]
+        if readers:
+            stream.flush()
+            with pa.ipc.new_stream(getattr(stream, "buffer", stream), readers[0].schema) as writer:
+                for reader in readers:
+                    for batch in reader:
+                        writer.write_batch(batch)
+        return messages[0] if messages else None
+
+    def __report_profile(self, options):
+        """
+        Prints the profile as a table for --profile and writes it as JSON for --profile-json.
+
+        Args:
+            options (dict): Validated command line options.
+        """
+        if self.profiler is None:
+            return
+        if options.get("profile"):
+            print(self.profiler.summary_table(), file=self.stream)
+        if options.get("profile_json"):
+            with open(options.get("profile_json"), "w") as profile_file:
+                profile_file.write(self.profiler.to_json())
+
+    def __build_summary_table(self, files_dir, cache, options):
+        """
+        Builds the parser for files_dir and the summary table on top of it. With the cache enabled, the file index,
+        summary table and archive saved by earlier runs are reused. Rows rejected while parsing are appended to
+        the --quarantine file; files served from the cache were validated when they were cached and are not read
+        again, so --no-cache quarantines the rejects of every file a query touches.
+
+        Args:
+            files_dir (str): Directory path where weather data files are located.
+            cache (WeatherCache): Cache of parsed files, or None when caching is disabled.
+            options (dict): Validated command line options.
+
+        Returns:
+            WeatherSummaryTable: The summary table, whose parser attribute reads the files.
+        """
+        from weather_archive import WeatherArchive
+        from weather_parser import WeatherParser
+        from weather_summary import WeatherSummaryTable
+        from weather_validation import WeatherValidator
+
+        with profile_stage(self.profiler, "index") as stage:
+            if cache:
+                index = WeatherFileIndex.load(files_dir, CACHE_DIR, self.station)
+            else:
+                index = WeatherFileIndex.build(files_dir, self.station)
+            stage["files"] += sum(len(filenames) for filenames in index.entries.values())
+        store = WeatherReadingStore(options.get("memory_cap", STORE_MEMORY_CAP_MB) * 1024 * 1024)
+        archive = None
+        if cache:
+            archive = WeatherArchive.load(WeatherArchive.archive_path(files_dir, CACHE_DIR, self.station))
+        parser = WeatherParser(files_dir, columnar=True, cache=cache, index=index, store=store,
+                               workers=options.get("workers", 1), profiler=self.profiler, archive=archive,
+                               station=self.station, validator=WeatherValidator(options.get("quarantine")))
+        if cache:
+            with profile_stage(self.profiler, "summaries"):
+                return WeatherSummaryTable.load(parser, CACHE_DIR)
+        return WeatherSummaryTable(parser)
+
+    def __serve(self, input_parser, cache, options):
+        """
+        Loads the archive once and answers queries from it over HTTP until interrupted.
+
+        Args:
+            input_parser (InputParsing): Parser holding the remaining command line arguments.
+            cache (WeatherCache): Cache of parsed files, or None when caching is disabled.
+            options (dict): Validated command line options.
+
+        Returns:
+            str: An error message when the arguments are invalid, otherwise a message once the server stopped.
+        """
+        import asyncio
+
+        from weather_server import WeatherServer
+
+        if len(input_parser.input_args) != 2:
+            return MESSAGES.get("usage")
+        files_dir = input_parser.input_args[1]
+        validation_result = input_parser.validate_file({"files_dir": files_dir})
+        if not validation_result.get("is_valid"):
+            return validation_result.get("message")
+
+        server = WeatherServer(self.__build_summary_table(files_dir, cache, options))
+        server.warm()
+        address = options.get("socket") or f"{SERVER_HOST}:{options.get('port', SERVER_PORT)}"
+        print(MESSAGES.get("serving").format(files_dir=files_dir, address=address), file=self.stream, flush=True)
+        try:
+            asyncio.run(server.serve(SERVER_HOST, options.get("port", SERVER_PORT), options.get("socket")))
+        except KeyboardInterrupt:
+            pass
+        return MESSAGES.get("server_stopped")
+
+    def __build_archive(self, input_parser, options):
+        """
+        Parses every file of the files directory and writes its memory-mapped archive, which later runs use
+        instead of reading the files of unchanged months.
+
+        Args:
+            input_parser (InputParsing): Parser holding the remaining command line arguments.
+            options (dict): Validated command line options.
+
+        Returns:
+            str: An error message when the arguments are invalid, otherwise a message describing the archive.
+        """
+        from weather_archive import WeatherArchive
+        from weather_parser import WeatherParser
+        from weather_validation import WeatherValidator
+
+        if len(input_parser.input_args) != 2:
+            return MESSAGES.get("usage")
+        files_dir = input_parser.input_args[1]
+        validation_result = input_parser.validate_file({"files_dir": files_dir})
+        if not validation_result.get("is_valid"):
+            return validation_result.get("message")
+
+        parser = WeatherParser(files_dir, columnar=True, workers=options.get("workers", 1), profiler=self.profiler,
+                               station=self.station, validator=WeatherValidator(options.get("quarantine")))
+        archive = WeatherArchive.build(parser, WeatherArchive.archive_path(files_dir, CACHE_DIR, self.station))
+        return MESSAGES.get("archived").format(readings=len(archive.dates), months=len(archive.offsets),
+                                               path=archive.path)
+
+    @staticmethod
+    def __ingest(summary_table):
+        """
+        Brings the summary table up to date with the files on disk and saves it.
+
+        Args:
+            summary_table (WeatherSummaryTable): The summary table of the files directory.
+
+        Returns:
+            str: A message describing what was ingested.
+        """
+        ingest_result = summary_table.ingest()
+        summary_table.save()
+        return MESSAGES.get("ingested").format(**ingest_result)
+
+    def __run_commands(self, input_parser, input_args, commands, summary_table, writer=None):
+        """
+        Validates and runs each command/date pair, printing its report or handing its results to the writer.
+
+        Args:
+            input_parser (InputParsing): Parser used to validate the commands.
+            input_args (dict): Validated input arguments, updated with each command and date.
+            commands (list): Command line arguments after the files directory.
+            summary_table (WeatherSummaryTable): The summary table, whose parser attribute reads the files.
+            writer (WeatherResultWriter): Writer of the results for --format json, csv or arrow, or None for the
+                                          text reports.
+
+        Returns:
+            str: An error message for the first invalid command, or None.
+        """
+        from weather_calculator import WeatherCalculator
+
+        parser = summary_table.parser
         option = 0
         while option < len(commands):
             input_args["command"] = commands[option]
@@ -64,35 +379,61 @@ class OutputResults:
             command = input_args.get("command")
             date = input_args.get("date")
 
-            parser = WeatherParser(files_dir)
+            months = months_in_period(date)
+            year, month = months[0]
+            is_range = ':' in date
+
+            if self.profiler is not None:
+                self.profiler.command = f"{command} {date}"
 
             if command == COMMANDS.get("get_yearly_extreme_weather_values"):
-                year = int(date)
-                weather_data = parser.parse_files_year_wise(year)
-                weather_calculator = WeatherCalculator(weather_data)
-                results = weather_calculator.calculate_yearly_extremes(year)
-                report = WeatherReport(results)
-                output = report.generate_extreme_weather_yearly_report()
-                print(output)
+                with profile_stage(self.profiler, "calculate"):
+                    weather_data = summary_table.iter_summaries(months)
+                    weather_calculator = WeatherCalculator(weather_data)
+                    results = weather_calculator.calculate_yearly_extremes(year)
+                if writer is not None:
+                    with profile_stage(self.profiler, "output"):
+                        writer.write(command, date, results)
+                else:
+                    with profile_stage(self.profiler, "report"):
+                        report = WeatherReport(results)
+                        output = report.generate_extreme_weather_yearly_report(show_year=is_range)
+                    with profile_stage(self.profiler, "output"):
+                        print(output, file=self.stream)
                 option += 2
             elif command == COMMANDS.get("get_yearly_average_weather_values"):
-                year, month = map(int, date.split('/'))
-                weather_data = parser.parse_files_month_wise(year=year, month=month)
-                weather_calculator = WeatherCalculator(weather_data)
-                results = weather_calculator.calculate_monthly_averages(year, month)
-                report = WeatherReport(results)
-                output = report.generate_average_weather_yearly_report()
-                print(output)
+                with profile_stage(self.profiler, "calculate"):
+                    weather_data = summary_table.iter_summaries(months)
+                    weather_calculator = WeatherCalculator(weather_data)
+                    results = weather_calculator.calculate_monthly_averages(year, month)
+                if writer is not None:
+                    with profile_stage(self.profiler, "output"):
+                        writer.write(command, date, results)
+                else:
+                    with profile_stage(self.profiler, "report"):
+                        report = WeatherReport(results)
+                        output = report.generate_average_weather_yearly_report()
+                    with profile_stage(self.profiler, "output"):
+                        print(output, file=self.stream)
                 option += 2
             elif command == COMMANDS.get("get_monthly_temperature_values"):
-                year, month = map(int, date.split('/'))
-                weather_data = parser.parse_files_month_wise(year=year, month=month)
-                weather_calculator = WeatherCalculator(weather_data)
-                results = weather_calculator.calculate_daily_temperatures(year, month)
-                report = WeatherReport(results)
-                output = report.generate_daily_temperatures_report(year, month)
-                print(output)
+                for year, month in months:
+                    with profile_stage(self.profiler, "calculate"):
+                        weather_data = parser.iter_files_month_wise(year=year, month=month)
+                        weather_calculator = WeatherCalculator(weather_data)
+                        results = weather_calculator.calculate_daily_temperatures(year, month)
+                    if writer is not None:
+                        with profile_stage(self.profiler, "output"):
+                            writer.write(command, f"{year}/{month}", results)
+                        continue
+                    with profile_stage(self.profiler, "output"):
+                        stream = self.stream or sys.stdout
+                        if is_range:
+                            stream.write(f"{calendar.month_name[month]} {year}\n")
+                        WeatherReport(results).write_daily_temperatures_report(stream, year, month)
+                        stream.write("\n")
                 option += 2
             else:
                 message = MESSAGES.get("invalid_command")
                 return message
+        return None
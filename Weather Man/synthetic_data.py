@@ -0,0 +1,105 @@
+"""
+synthetic_data.py
+
+This module writes synthetic weather data files in the layout of the real Lahore files, so the pipeline can be
+benchmarked at any scale without the original archive.
+
+Usage:
+- python synthetic_data.py <files_dir> [start_year] [end_year] [station]
+
+Functions:
+- generate_weather_file(file_path, year, month, random_generator, missing_rate): Writes the file of one month.
+- generate_weather_files(files_dir, start_year, end_year, seed, missing_rate, station): Writes one file per month of
+  a station for a range of years.
+"""
+
+import calendar
+import math
+import os
+import random
+import sys
+
+from constants import DEFAULT_STATION, MONTH_MAP, STATION_FILE_INFIX
+
+HEADER_COLUMNS = [
+    "Max TemperatureC", "Mean TemperatureC", "Min TemperatureC", "Dew PointC", "MeanDew PointC", "Min DewpointC",
+    "Max Humidity", " Mean Humidity", " Min Humidity", " Max Sea Level PressurehPa", " Mean Sea Level PressurehPa",
+    " Min Sea Level PressurehPa", " Max VisibilityKm", " Mean VisibilityKm", " Min VisibilitykM",
+    " Max Wind SpeedKm/h", " Mean Wind SpeedKm/h", " Max Gust SpeedKm/h", "Precipitationmm", " CloudCover",
+    " Events", "WindDirDegrees",
+]
+
+
+def generate_weather_file(file_path, year, month, random_generator, missing_rate=0.01):
+    """
+    Writes the weather data file of one month with a seasonal temperature curve and random humidity.
+
+    Args:
+        file_path (str): Path of the file to write.
+        year (int): Year of the readings.
+        month (int): Month (1-12) of the readings.
+        random_generator (random.Random): Source of random values.
+        missing_rate (float): Share of rows whose maximum temperature is left empty, as in the real files.
+    """
+    date_column = "PKST" if year >= 2008 and 4 <= month <= 10 else "PKT"
+    lines = [",".join([date_column] + HEADER_COLUMNS)]
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        season = math.sin((month - 1 + day / 31) / 12 * 2 * math.pi - math.pi / 2)
+        max_temperature = round(30 + 12 * season + random_generator.gauss(0, 3))
+        min_temperature = max_temperature - random_generator.randint(6, 14)
+        mean_temperature = (max_temperature + min_temperature) // 2
+        max_humidity = random_generator.randint(50, 100)
+        mean_humidity = random_generator.randint(25, max_humidity)
+        min_humidity = random_generator.randint(5, mean_humidity)
+        row = [
+            f"{year}-{month}-{day}",
+            "" if random_generator.random() < missing_rate else max_temperature,
+            mean_temperature, min_temperature, 8, 5, 2,
+            max_humidity, mean_humidity, min_humidity, 1012, 1008, 1004, 10, 6, 3, 24, 9, "", "0.0", "",
+            "Rain" if random_generator.random() < 0.1 else "", random_generator.randint(0, 359),
+        ]
+        lines.append(",".join(map(str, row)))
+    with open(file_path, "w") as weather_file:
+        weather_file.write("\n".join(lines) + "\n")
+
+
+def generate_weather_files(files_dir, start_year=1996, end_year=2011, seed=0, missing_rate=0.01,
+                           station=DEFAULT_STATION):
+    """
+    Writes one weather data file per month for every year from start_year to end_year.
+
+    Args:
+        files_dir (str): Directory path where the files are written; created when missing.
+        start_year (int): First year to generate.
+        end_year (int): Last year to generate.
+        seed (int): Seed of the random values, so the same arguments always produce the same files.
+        missing_rate (float): Share of rows whose maximum temperature is left empty.
+        station (str): Station named in the file names.
+
+    Returns:
+        int: Number of files written.
+    """
+    os.makedirs(files_dir, exist_ok=True)
+    random_generator = random.Random(seed)
+    file_count = 0
+    for year in range(start_year, end_year + 1):
+        for month in range(1, 13):
+            file_path = os.path.join(files_dir, f"{station}{STATION_FILE_INFIX}{year}_{MONTH_MAP[month]}.txt")
+            generate_weather_file(file_path, year, month, random_generator, missing_rate)
+            file_count += 1
+    return file_count
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: synthetic_data.py /path/to/files-dir [start_year] [end_year] [station]")
+        return
+    start_year = int(sys.argv[2]) if len(sys.argv) > 2 else 1996
+    end_year = int(sys.argv[3]) if len(sys.argv) > 3 else 2011
+    station = sys.argv[4] if len(sys.argv) > 4 else DEFAULT_STATION
+    file_count = generate_weather_files(sys.argv[1], start_year, end_year, station=station)
+    print(f"Wrote {file_count} files to {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+test_weather_validation.py
+
+This module tests the WeatherValidator class. Run it from the Weather Man directory with
+python -m unittest test_weather_validation.
+
+Classes:
+- WeatherValidatorTests: A class to check which values WeatherValidator rejects and how it accounts for them.
+
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from constants import MEASUREMENT_COLUMNS
+from weather_validation import QUARANTINE_COLUMNS, WeatherValidator
+
+
+def raw_rows(*rows):
+    """
+    Turns rows of a date and six measurement values into the raw columns WeatherValidator.validate takes.
+
+    Args:
+        rows (tuple): Rows of seven str values each.
+
+    Returns:
+        list: The date column followed by the six measurement columns.
+    """
+    return [list(column) for column in zip(*rows)]
+
+
+class WeatherValidatorTests(unittest.TestCase):
+    """
+    A class to check which values WeatherValidator rejects, the counts it keeps of them, its quarantine file and the
+    summary line of a file.
+    """
+
+    def setUp(self):
+        """
+        Creates a validator that prints no summary lines.
+        """
+        self.validator = WeatherValidator(report=False)
+
+    def test_valid_rows_are_kept(self):
+        """
+        Checks that unpadded dates and numbers with a sign, an exponent or spaces are converted.
+        """
+        batch = self.validator.validate("f.txt", "PKT", raw_rows(("2005-6-2", "41", "-3", " 4", "1.5e1", "+2", ".5"),
+                                                                 ("2005-06-12", "1", "1", "1", "1", "1", "1")))
+        self.assertEqual(batch.dates.tolist(), np.array(["2005-06-02", "2005-06-12"], dtype="datetime64[D]").tolist())
+        self.assertEqual([getattr(batch, column)[0] for column in batch.COLUMNS], [41, -3, 4, 15, 2, 0.5])
+        self.assertEqual(self.validator.files["f.txt"], {"rows": 2, "rejected": 0, "rejects": {}})
+
+    def test_missing_and_malformed_values_are_counted_apart(self):
+        """
+        Checks that empty values are counted as missing and values that are not numbers or dates as malformed.
+        """
+        batch = self.validator.validate("f.txt", "PKT", raw_rows(("2005-6-1", "", "20", "10", "80", "50", "20"),
+                                                                 ("2005-6-2", "-", "20", "10", "80", "", "20"),
+                                                                 ("2005-2-30", "30", "20", "10", "80", "50", "20"),
+                                                                 ("Total", "30", "20", "10", "80", "50", "20"),
+                                                                 ("2005-6-5", "30", "20", "10", "80", "50", "20")))
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(self.validator.files["f.txt"]["rows"], 5)
+        self.assertEqual(self.validator.files["f.txt"]["rejected"], 4)
+        rejects = self.validator.files["f.txt"]["rejects"]
+        self.assertEqual(rejects["PKT"], {"missing": 0, "malformed": 2})
+        self.assertEqual(rejects["Max TemperatureC"], {"missing": 1, "malformed": 1})
+        self.assertEqual(rejects["Mean Humidity"], {"missing": 1, "malformed": 0})
+        self.assertEqual(rejects["Min Humidity"], {"missing": 0, "malformed": 0})
+
+    def test_infinite_and_nan_values_are_malformed(self):
+        """
+        Checks that 'inf', '-inf' and 'nan' cast to floats but are rejected as malformed all the same.
+        """
+        values = ("inf", "-inf", "Infinity", "nan", "NaN")
+        rows = ((f"2005-6-{day}", value, "20", "10", "80", "50", "20") for day, value in enumerate(values, 1))
+        batch = self.validator.validate("f.txt", "PKT", raw_rows(*rows))
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(self.validator.files["f.txt"]["rejects"]["Max TemperatureC"],
+                         {"missing": 0, "malformed": len(values)})
+
+    def test_counts_add_up_across_chunks_until_the_file_restarts(self):
+        """
+        Checks that the counts of a file add up over several validate calls and are reset by start_file.
+        """
+        row = ("2005-6-1", "", "20", "10", "80", "50", "20")
+        self.validator.validate("f.txt", "PKT", raw_rows(row, row))
+        self.validator.validate("f.txt", "PKT", raw_rows(row))
+        self.assertEqual((self.validator.files["f.txt"]["rows"], self.validator.files["f.txt"]["rejected"]), (3, 3))
+        self.validator.start_file("f.txt")
+        self.assertEqual(self.validator.files["f.txt"], {"rows": 0, "rejected": 0, "rejects": {}})
+
+    def test_rejected_rows_are_quarantined_with_their_row_numbers(self):
+        """
+        Checks the quarantine file: one header, then every rejected row with its number in the file, counted from
+        first_row, its reasons and its raw values.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            quarantine_path = os.path.join(directory, "quarantine.csv")
+            validator = WeatherValidator(quarantine_path, report=False)
+            validator.validate("f.txt", "PKT", raw_rows(("2005-6-1", "30", "20", "10", "80", "50", "20"),
+                                                        ("2005-6-2", "", "x", "10", "80", "50", "20")), first_row=1)
+            WeatherValidator(quarantine_path, report=False).validate(
+                "f.txt", "PKST", raw_rows(("2005-6-3", "30", "20", "10", "80", "50", "20"),
+                                          ("Total", "30", "20", "10", "80", "50", "inf")), first_row=3)
+            with open(quarantine_path, newline="") as quarantine_file:
+                rows = list(csv.reader(quarantine_file))
+
+        self.assertEqual(rows, [list(QUARANTINE_COLUMNS),
+                                ["f.txt", "2", "Max TemperatureC: missing; Mean TemperatureC: malformed",
+                                 "2005-6-2", "", "x", "10", "80", "50", "20"],
+                                ["f.txt", "4", "PKST: malformed; Min Humidity: malformed",
+                                 "Total", "30", "20", "10", "80", "50", "inf"]])
+
+    def test_summary_line(self):
+        """
+        Checks the summary line of a file with rejected rows, named by its base name, of a file without any, and of
+        an unknown file.
+        """
+        file_path = os.path.join("data", "f.txt")
+        self.validator.validate(file_path, "PKT", raw_rows(("2005-6-1", "", "20", "10", "80", "50", "20"),
+                                                           ("2005-6-2", "", "20", "x", "80", "50", "20"),
+                                                           ("2005-6-3", "30", "20", "10", "80", "50", "20")))
+        self.validator.validate("g.txt", "PKT", raw_rows(("2005-6-3", "30", "20", "10", "80", "50", "20")))
+        self.assertEqual(self.validator.summary_line(file_path),
+                         "f.txt: rejected 2 of 3 rows (Max TemperatureC: 2 missing; Min TemperatureC: 1 malformed)")
+        self.assertEqual(self.validator.summary_line("g.txt"), "g.txt: rejected 0 of 1 rows (none)")
+        self.assertEqual(self.validator.summary_line("h.txt"), "h.txt: rejected 0 of 0 rows (none)")
+
+    def test_record_file(self):
+        """
+        Checks that the counts of a file validated by another validator, as in a worker process, are taken over.
+        """
+        worker = WeatherValidator(report=False)
+        worker.validate("f.txt", "PKT", raw_rows(("2005-6-1", "", "20", "10", "80", "50", "20")))
+        self.validator.record_file("f.txt", worker.files["f.txt"])
+        self.assertEqual(self.validator.summary_line("f.txt"), worker.summary_line("f.txt"))
+        self.assertEqual(set(self.validator.files["f.txt"]["rejects"]), {"PKT", *MEASUREMENT_COLUMNS})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+weather_aggregator.py
+
+This module defines the WeatherAggregator class, which computes extremes, averages, counts and daily temperatures in
+a single pass over weather readings.
+
+Classes:
+- WeatherAggregator: A class to aggregate a stream of WeatherData objects and WeatherDataBatch objects.
+
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from weather_data import WeatherDataBatch
+
+
+class WeatherAggregator:
+    """
+    A class to aggregate weather readings in a single pass.
+
+    Readings may be given one WeatherData at a time or as whole WeatherDataBatch objects, in any mix. Only running
+    totals and the current extremes are kept, so memory does not grow with the number of readings unless the daily
+    series is requested.
+
+    Attributes:
+        count (int): Number of readings seen.
+        keep_daily (bool): Whether the daily maximum and minimum temperatures are kept.
+
+    Methods:
+        add(reading): Adds a single WeatherData reading.
+        add_batch(batch): Adds all readings of a WeatherDataBatch.
+        merge(other): Adds everything another WeatherAggregator has seen.
+        consume(readings): Adds every reading, batch or aggregator of an iterable.
+        yearly_extremes(): Returns the highest temperature, lowest temperature and most humid day.
+        monthly_averages(): Returns the average highest and lowest temperatures and the average mean humidity.
+        daily_temperatures(): Returns the maximum and minimum temperature of each day.
+        to_dict(): Returns the counts, sums and extremes as a JSON-serializable dictionary.
+        from_dict(data): Creates an aggregator from a dictionary returned by to_dict().
+    """
+
+    def __init__(self, keep_daily=False):
+        """
+        Initializes an empty WeatherAggregator.
+
+        Args:
+            keep_daily (bool): Keep the daily maximum and minimum temperatures for daily_temperatures().
+        """
+        self.count = 0
+        self.keep_daily = keep_daily
+        self.__sums = defaultdict(float)
+        self.__highest = None
+        self.__lowest = None
+        self.__most_humid = None
+        self.__daily = defaultdict(lambda: defaultdict(float))
+
+    def add(self, reading):
+        """
+        Adds a single WeatherData reading.
+
+        Args:
+            reading (WeatherData): The reading to add.
+        """
+        self.__update_extremes(highest=(reading.max_temperature, reading.date, None),
+                               lowest=(reading.min_temperature, reading.date, None),
+                               most_humid=(reading.max_humidity, reading.date, None))
+        self.count += 1
+        self.__sums["max_temperature"] += reading.max_temperature
+        self.__sums["min_temperature"] += reading.min_temperature
+        self.__sums["mean_humidity"] += reading.mean_humidity
+        if self.keep_daily:
+            self.__daily[reading.date]["max_temperature"] = reading.max_temperature
+            self.__daily[reading.date]["min_temperature"] = reading.min_temperature
+
+    def add_batch(self, batch):
+        """
+        Adds all readings of a WeatherDataBatch using vectorized operations on its columns.
+
+        Args:
+            batch (WeatherDataBatch): The readings to add.
+        """
+        if not len(batch):
+            return
+        highest = int(batch.max_temperature.argmax())
+        lowest = int(batch.min_temperature.argmin())
+        most_humid = int(batch.max_humidity.argmax())
+        self.__update_extremes(highest=(float(batch.max_temperature[highest]), batch, highest),
+                               lowest=(float(batch.min_temperature[lowest]), batch, lowest),
+                               most_humid=(float(batch.max_humidity[most_humid]), batch, most_humid))
+        self.count += len(batch)
+        self.__sums["max_temperature"] += float(batch.max_temperature.sum(dtype=np.float64))
+        self.__sums["min_temperature"] += float(batch.min_temperature.sum(dtype=np.float64))
+        self.__sums["mean_humidity"] += float(batch.mean_humidity.sum(dtype=np.float64))
+        if self.keep_daily:
+            dates = batch.dates.astype("datetime64[s]").tolist()
+            for date, max_temperature, min_temperature in zip(dates, batch.max_temperature.tolist(),
+                                                              batch.min_temperature.tolist()):
+                self.__daily[date]["max_temperature"] = max_temperature
+                self.__daily[date]["min_temperature"] = min_temperature
+
+    def merge(self, other):
+        """
+        Adds everything another WeatherAggregator has seen, as if its readings had been added here. The daily series
+        of the other aggregator is not merged.
+
+        Args:
+            other (WeatherAggregator): The aggregator to merge.
+
+        Returns:
+            WeatherAggregator: The aggregator itself.
+        """
+        if not other.count:
+            return self
+        self.__update_extremes(highest=other.__resolved(other.__highest),
+                               lowest=other.__resolved(other.__lowest),
+                               most_humid=other.__resolved(other.__most_humid))
+        self.count += other.count
+        for name, value in other.__sums.items():
+            self.__sums[name] += value
+        return self
+
+    def consume(self, readings):
+        """
+        Adds every reading of an iterable. Items may be WeatherData, WeatherDataBatch or WeatherAggregator objects.
+
+        Args:
+            readings (iterable): The readings to add; a generator is consumed exactly once.
+
+        Returns:
+            WeatherAggregator: The aggregator itself.
+        """
+        for reading in readings:
+            if isinstance(reading, WeatherDataBatch):
+                self.add_batch(reading)
+            elif isinstance(reading, WeatherAggregator):
+                self.merge(reading)
+            else:
+                self.add(reading)
+        return self
+
+    def __update_extremes(self, highest, lowest, most_humid):
+        """
+        Replaces the current extremes by new candidates when they are strictly more extreme, so the first reading
+        wins a tie. A candidate is a (value, date or batch, position in batch or None) tuple; batch dates are only
+        converted to datetime when they are read.
+
+        Args:
+            highest (tuple): Candidate for the highest temperature.
+            lowest (tuple): Candidate for the lowest temperature.
+            most_humid (tuple): Candidate for the most humid day.
+        """
+        if self.__highest is None or highest[0] > self.__highest[0]:
+            self.__highest = highest
+        if self.__lowest is None or lowest[0] < self.__lowest[0]:
+            self.__lowest = lowest
+        if self.__most_humid is None or most_humid[0] > self.__most_humid[0]:
+            self.__most_humid = most_humid
+
+    @classmethod
+    def __resolved(cls, candidate):
+        """
+        Returns an extreme candidate with its date converted to datetime, so it no longer refers to a batch.
+
+        Args:
+            candidate (tuple): A (value, date or batch, position in batch or None) tuple.
+
+        Returns:
+            tuple: A (value, date, None) tuple.
+        """
+        return candidate[0], cls.__date_of(candidate), None
+
+    @staticmethod
+    def __date_of(candidate):
+        """
+        Returns the date of an extreme candidate.
+
+        Args:
+            candidate (tuple): A (value, date or batch, position in batch or None) tuple.
+
+        Returns:
+            datetime: The date of the candidate.
+        """
+        _, source, position = candidate
+        return source if position is None else source.date_at(position)
+
+    def yearly_extremes(self):
+        """
+        Returns the highest temperature, lowest temperature and most humid day seen.
+
+        Returns:
+            defaultdict: Dictionary containing the extremes and their dates, empty when no readings were seen.
+        """
+        yearly_extremes = defaultdict(lambda: defaultdict(int))
+        if not self.count:
+            return yearly_extremes
+        yearly_extremes["highest_temperature"]["temperature"] = self.__highest[0]
+        yearly_extremes["highest_temperature"]["date"] = self.__date_of(self.__highest)
+        yearly_extremes["lowest_temperature"]["temperature"] = self.__lowest[0]
+        yearly_extremes["lowest_temperature"]["date"] = self.__date_of(self.__lowest)
+        yearly_extremes["most_humid_day"]["humidity"] = self.__most_humid[0]
+        yearly_extremes["most_humid_day"]["date"] = self.__date_of(self.__most_humid)
+        return yearly_extremes
+
+    def monthly_averages(self):
+        """
+        Returns the average highest temperature, average lowest temperature and average mean humidity.
+
+        Returns:
+            defaultdict: Dictionary containing the averages, empty when no readings were seen.
+        """
+        monthly_averages = defaultdict(float)
+        if not self.count:
+            return monthly_averages
+        monthly_averages["average_highest_temperature"] = self.__sums["max_temperature"] / self.count
+        monthly_averages["average_lowest_temperature"] = self.__sums["min_temperature"] / self.count
+        monthly_averages["average_mean_humidity"] = self.__sums["mean_humidity"] / self.count
+        return monthly_averages
+
+    def daily_temperatures(self):
+        """
+        Returns the maximum and minimum temperature of each day, in the order the days were seen.
+
+        Returns:
+            defaultdict: Dictionary mapping dates to their maximum and minimum temperatures.
+        """
+        return self.__daily
+
+    def to_dict(self):
+        """
+        Returns the counts, sums and extremes as a JSON-serializable dictionary. The daily series is not included.
+
+        Returns:
+            dict: Dictionary describing the aggregator.
+        """
+        extremes = {}
+        if self.count:
+            for name, candidate in (("highest", self.__highest), ("lowest", self.__lowest),
+                                    ("most_humid", self.__most_humid)):
+                extremes[name] = [candidate[0], self.__date_of(candidate).isoformat()]
+        return {"count": self.count, "sums": dict(self.__sums), "extremes": extremes}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates an aggregator from a dictionary returned by to_dict().
+
+        Args:
+            data (dict): Dictionary describing the aggregator.
+
+        Returns:
+            WeatherAggregator: The restored aggregator.
+        """
+        aggregator = cls()
+        aggregator.count = data["count"]
+        aggregator.__sums.update(data["sums"])
+        extremes = {name: (value, datetime.fromisoformat(date), None) for name, (value, date) in
+                    data["extremes"].items()}
+        aggregator.__highest = extremes.get("highest")
+        aggregator.__lowest = extremes.get("lowest")
+        aggregator.__most_humid = extremes.get("most_humid")
+        return aggregator
@@ -0,0 +1,173 @@
+"""
+weather_analytics.py
+
+This module defines the WeatherAnalytics class, which computes rolling means, monthly percentiles, anomalies against
+the long-term climatology and heat-wave streaks with NumPy operations over the columns of a WeatherDataBatch, so
+statistics over the whole archive take milliseconds instead of a Python loop per reading.
+
+Classes:
+- WeatherAnalytics: A class to compute vectorized statistics over a columnar series of weather readings.
+
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from weather_data import WeatherDataBatch
+
+
+class WeatherAnalytics:
+    """
+    A class to compute vectorized statistics over a columnar series of weather readings.
+
+    The readings are sorted by date once. Days without a reading are gaps: a rolling window containing a gap has
+    no mean, and a gap ends a heat-wave streak.
+
+    Attributes:
+        batch (WeatherDataBatch): The readings, sorted by date.
+
+    Methods:
+        rolling_means(column, window): Returns the mean of a measurement over every window of consecutive days.
+        monthly_percentiles(column, percentiles): Returns percentiles of a measurement for every month.
+        climatology_anomalies(column): Returns how far each reading is from the mean of its calendar day.
+        heat_waves(threshold, min_days): Returns the streaks of consecutive days at or above a maximum temperature.
+    """
+
+    def __init__(self, batch):
+        """
+        Initializes WeatherAnalytics with the readings to analyze.
+
+        Args:
+            batch (WeatherDataBatch): The readings, in any order.
+        """
+        order = np.argsort(batch.dates, kind="stable")
+        self.batch = WeatherDataBatch(batch.dates[order], *(getattr(batch, column)[order]
+                                                            for column in WeatherDataBatch.COLUMNS))
+
+    def __daily(self, column):
+        """
+        Spreads a measurement over every calendar day from the first reading to the last, with NaN on the days
+        without a reading.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+
+        Returns:
+            tuple: The datetime64[D] days and the float64 values of the measurement on those days.
+        """
+        dates = self.batch.dates
+        if not len(dates):
+            return dates, np.empty(0)
+        days = np.arange(dates[0], dates[-1] + 1, dtype="datetime64[D]")
+        values = np.full(len(days), np.nan)
+        values[(dates - dates[0]).astype(np.int64)] = getattr(self.batch, column)
+        return days, values
+
+    def rolling_means(self, column, window):
+        """
+        Returns the mean of a measurement over every window of consecutive calendar days. The mean is given for the
+        last day of each window and is NaN when a day of the window has no reading.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+            window (int): Number of days in a window.
+
+        Returns:
+            dict: Dictionary holding the datetime64[D] 'dates' that end a full window and their 'means'.
+        """
+        days, values = self.__daily(column)
+        if len(days) < window:
+            return {"dates": days[:0], "means": values[:0]}
+        present = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(present)))
+        window_sums = sums[window:] - sums[:-window]
+        window_counts = counts[window:] - counts[:-window]
+        means = np.where(window_counts == window, window_sums / window, np.nan)
+        return {"dates": days[window - 1:], "means": means}
+
+    def monthly_percentiles(self, column, percentiles=(10, 50, 90)):
+        """
+        Returns percentiles of a measurement for every month, interpolated linearly as numpy.percentile does.
+        All months are computed together from one sort of the readings by month and value.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+            percentiles (tuple): Percentiles between 0 and 100.
+
+        Returns:
+            defaultdict: Dictionary mapping (year, month) tuples to dictionaries of percentile values.
+        """
+        monthly_percentiles = defaultdict(dict)
+        if not len(self.batch):
+            return monthly_percentiles
+        values = getattr(self.batch, column).astype(np.float64)
+        months = self.batch.dates.astype("datetime64[M]").astype(np.int64)
+        order = np.lexsort((values, months))
+        values, months = values[order], months[order]
+        starts = np.flatnonzero(np.concatenate(([True], months[1:] != months[:-1])))
+        counts = np.diff(np.append(starts, len(values)))
+
+        for percentile in percentiles:
+            positions = starts + percentile / 100 * (counts - 1)
+            lower = np.floor(positions).astype(np.int64)
+            upper = np.ceil(positions).astype(np.int64)
+            results = values[lower] + (values[upper] - values[lower]) * (positions - lower)
+            for month, result in zip(months[starts].tolist(), results.tolist()):
+                monthly_percentiles[(1970 + month // 12, month % 12 + 1)][percentile] = result
+        return monthly_percentiles
+
+    def climatology_anomalies(self, column):
+        """
+        Returns how far each reading is from the climatology of its calendar day, i.e. the mean of the measurement
+        over every year on the same month and day.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+
+        Returns:
+            dict: Dictionary holding the datetime64[D] 'dates', the 'climatology' of each date and the 'anomalies'.
+        """
+        dates = self.batch.dates
+        values = getattr(self.batch, column).astype(np.float64)
+        month_starts = dates.astype("datetime64[M]")
+        calendar_days = (month_starts.astype(np.int64) % 12) * 31 + (dates - month_starts).astype(np.int64)
+        totals = np.bincount(calendar_days, weights=values, minlength=12 * 31)
+        counts = np.bincount(calendar_days, minlength=12 * 31)
+        climatology = (totals / np.maximum(counts, 1))[calendar_days]
+        return {"dates": dates, "climatology": climatology, "anomalies": values - climatology}
+
+    def heat_waves(self, threshold, min_days=3):
+        """
+        Returns the streaks of at least min_days consecutive days whose maximum temperature is at or above the
+        threshold.
+
+        Args:
+            threshold (float): The lowest maximum temperature of a hot day.
+            min_days (int): The fewest consecutive hot days that make a heat wave.
+
+        Returns:
+            list: One dictionary per heat wave with its 'start' and 'end' dates, its number of 'days' and its
+            'peak' temperature, in date order.
+        """
+        days, values = self.__daily("max_temperature")
+        hot = np.concatenate(([False], np.nan_to_num(values, nan=-np.inf) >= threshold, [False]))
+        edges = np.diff(hot.astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        stops = np.flatnonzero(edges == -1)
+        long_enough = stops - starts >= min_days
+        starts, stops = starts[long_enough], stops[long_enough]
+        if not len(starts):
+            return []
+        bounds = np.column_stack((starts, stops)).ravel()
+        peaks = np.maximum.reduceat(np.append(values, np.nan), bounds)[::2]
+        heat_waves = []
+        for start, stop, peak in zip(starts.tolist(), stops.tolist(), peaks.tolist()):
+            heat_waves.append({
+                "start": days[start].astype("datetime64[s]").item(),
+                "end": days[stop - 1].astype("datetime64[s]").item(),
+                "days": stop - start,
+                "peak": peak,
+            })
+        return heat_waves
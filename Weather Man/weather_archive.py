@@ -0,0 +1,181 @@
+"""
+weather_archive.py
+
+This module defines the WeatherArchive class, a columnar copy of a whole directory of weather data files that is
+memory-mapped instead of parsed, so a query only touches the pages of the months it needs and concurrent processes
+share them through the OS page cache.
+
+Classes:
+- WeatherArchive: A class to write and memory-map the columnar archive of a files directory.
+
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from constants import DEFAULT_STATION
+from weather_data import WeatherDataBatch
+from weather_index import station_key
+
+ARCHIVE_MEASUREMENT_DTYPE = np.float64
+
+
+class WeatherArchive:
+    """
+    A class to write and memory-map the columnar archive of a files directory.
+
+    An archive is a directory holding one .npy file per column, a datetime64[D] date column (an int64 day ordinal
+    counted from 1970-01-01) and six float64 measurement columns, plus months.json, the month offset table. The
+    readings are stored month after month, in the order the parser yields them, and the table maps every month to
+    its [start, stop) rows and to the mtime and size its source files had when the archive was written. A month is
+    only served from the archive while its files are unchanged. The measurements are stored as float64, as parsed,
+    so the readings sliced out of the archive are the ones read from the files and reports do not depend on whether
+    an archive exists.
+
+    Attributes:
+        path (str): Directory path of the archive.
+        dates (numpy.ndarray): Memory-mapped date column.
+        columns (dict): Dictionary mapping measurement names to their memory-mapped columns.
+        offsets (dict): Dictionary mapping (year, month) tuples to (start, stop) row positions.
+        manifest (dict): Dictionary mapping (year, month) tuples to {file name: [mtime_ns, size]} dictionaries.
+
+    Methods:
+        archive_path(files_dir, archive_dir, station): Returns the directory path of the archive of a station.
+        build(parser, path): Parses every file of the parser's directory and writes the archive.
+        load(path): Memory-maps an archive, or returns None when there is none.
+        months_batch(months): Returns the readings of consecutive months without copying them.
+    """
+
+    def __init__(self, path, dates, columns, offsets, manifest):
+        """
+        Initializes WeatherArchive with its memory-mapped columns and month table.
+
+        Args:
+            path (str): Directory path of the archive.
+            dates (numpy.ndarray): Memory-mapped date column.
+            columns (dict): Dictionary mapping measurement names to their memory-mapped columns.
+            offsets (dict): Dictionary mapping (year, month) tuples to (start, stop) row positions.
+            manifest (dict): Dictionary mapping (year, month) tuples to {file name: [mtime_ns, size]} dictionaries.
+        """
+        self.path = path
+        self.dates = dates
+        self.columns = columns
+        self.offsets = offsets
+        self.manifest = manifest
+
+    @staticmethod
+    def archive_path(files_dir, archive_dir, station=DEFAULT_STATION):
+        """
+        Returns the directory path of the archive of a station's files in files_dir.
+
+        Args:
+            files_dir (str): Directory path where weather data files are located.
+            archive_dir (str): Directory path where archives are written.
+            station (str): The station of the files.
+
+        Returns:
+            str: Directory path of the archive.
+        """
+        return os.path.join(archive_dir, f"{station_key(files_dir, station)}.archive")
+
+    @classmethod
+    def build(cls, parser, path):
+        """
+        Parses every file of the parser's directory and writes the archive. The files of all months are parsed
+        together, in parallel when the parser has several workers. The columns are written to a temporary directory
+        that replaces the previous archive once complete, so readers never see a partial archive.
+
+        Args:
+            parser (WeatherParser): Columnar parser reading the files; it must not use an archive itself.
+            path (str): Directory path of the archive.
+
+        Returns:
+            WeatherArchive: The new archive, memory-mapped.
+        """
+        months = sorted(parser.index.entries)
+        batches = [WeatherDataBatch.concatenate(list(readings)) for _, readings in parser.iter_months(months)]
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(temporary_path, exist_ok=True)
+
+        dates = np.lib.format.open_memmap(os.path.join(temporary_path, "dates.npy"), mode="w+",
+                                          dtype="datetime64[D]", shape=(sum(len(batch) for batch in batches),))
+        columns = {column: np.lib.format.open_memmap(os.path.join(temporary_path, f"{column}.npy"), mode="w+",
+                                                     dtype=ARCHIVE_MEASUREMENT_DTYPE, shape=dates.shape)
+                   for column in WeatherDataBatch.COLUMNS}
+        month_entries = []
+        start = 0
+        for (year, month), batch in zip(months, batches):
+            stop = start + len(batch)
+            dates[start:stop] = batch.dates
+            for column, values in columns.items():
+                values[start:stop] = getattr(batch, column)
+            month_files = {}
+            for file_path in parser.index.files_for_month(year, month):
+                stat = os.stat(file_path)
+                month_files[os.path.basename(file_path)] = [stat.st_mtime_ns, stat.st_size]
+            month_entries.append({"year": year, "month": month, "start": start, "stop": stop, "files": month_files})
+            start = stop
+        for array in (dates, *columns.values()):
+            array.flush()
+        del dates, columns
+        with open(os.path.join(temporary_path, "months.json"), "w") as months_file:
+            json.dump({"months": month_entries}, months_file)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temporary_path, path)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps the columns of an archive and reads its month table.
+
+        Args:
+            path (str): Directory path of the archive.
+
+        Returns:
+            WeatherArchive: The archive, or None when there is no complete archive at path, or its measurement
+            columns were written with another dtype by an earlier version.
+        """
+        try:
+            with open(os.path.join(path, "months.json")) as months_file:
+                month_entries = json.load(months_file)["months"]
+            dates = np.load(os.path.join(path, "dates.npy"), mmap_mode="r")
+            columns = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+                       for column in WeatherDataBatch.COLUMNS}
+        except (OSError, ValueError, KeyError):
+            return None
+        if any(values.dtype != ARCHIVE_MEASUREMENT_DTYPE for values in columns.values()):
+            return None
+        offsets = {(entry["year"], entry["month"]): (entry["start"], entry["stop"]) for entry in month_entries}
+        manifest = {(entry["year"], entry["month"]): entry["files"] for entry in month_entries}
+        return cls(path, dates, columns, offsets, manifest)
+
+    def months_batch(self, months):
+        """
+        Returns the readings of consecutive months as views of the memory-mapped columns, without copying them.
+
+        Args:
+            months (list): ((year, month), month_files) pairs in month order, where month_files holds the current
+                           {file name: [mtime_ns, size]} of the month's files.
+
+        Returns:
+            WeatherDataBatch: The readings of the months, or None when a month is not in the archive, its files
+            changed since the archive was written, or the months are not stored next to each other.
+        """
+        start = stop = None
+        for year_month, month_files in months:
+            if year_month not in self.offsets or self.manifest.get(year_month) != month_files:
+                return None
+            month_start, month_stop = self.offsets[year_month]
+            if stop is not None and month_start != stop:
+                return None
+            start = month_start if start is None else start
+            stop = month_stop
+        if start is None:
+            return None
+        return WeatherDataBatch(self.dates[start:stop], *(self.columns[column][start:stop]
+                                                           for column in WeatherDataBatch.COLUMNS))
@@ -0,0 +1,111 @@
+"""
+weather_cache.py
+
+This module defines the WeatherCache class, which keeps parsed weather data files on disk in NumPy's binary .npz
+format so that repeat runs do not have to parse the CSV files again. NumPy is imported on first use, so clearing the
+cache does not load it.
+
+Classes:
+- WeatherCache: A class to store and load parsed weather data files keyed by their path, mtime and size.
+
+"""
+
+import hashlib
+import os
+import shutil
+import zipfile
+
+
+class WeatherCache:
+    """
+    A class to store and load parsed weather data files in a cache directory.
+
+    Each source file gets one .npz entry named after a hash of its absolute path. The entry also records the mtime
+    and size of the source file; when either changes the entry is treated as stale and rebuilt by the caller.
+
+    Attributes:
+        cache_dir (str): Directory path where cache entries are stored.
+
+    Methods:
+        load(file_path): Returns the cached WeatherDataBatch of a file, or None when it is missing or stale.
+        store(file_path, batch): Writes the WeatherDataBatch of a file to the cache.
+        clear(): Removes every cache entry.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        Initializes WeatherCache with the directory holding the cache entries.
+
+        Args:
+            cache_dir (str): Directory path where cache entries are stored.
+        """
+        self.cache_dir = cache_dir
+
+    def __entry_path(self, file_path):
+        """
+        Returns the path of the cache entry belonging to a source file.
+
+        Args:
+            file_path (str): Path to the weather data file.
+
+        Returns:
+            str: Path to the .npz cache entry.
+        """
+        key = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, file_path):
+        """
+        Returns the cached WeatherDataBatch of a file.
+
+        Args:
+            file_path (str): Path to the weather data file.
+
+        Returns:
+            WeatherDataBatch: The cached readings, or None when there is no entry or the file changed since it was
+            cached.
+        """
+        import numpy as np
+
+        from weather_data import WeatherDataBatch
+
+        try:
+            stat = os.stat(file_path)
+            with np.load(self.__entry_path(file_path)) as entry:
+                if int(entry["mtime_ns"]) != stat.st_mtime_ns or int(entry["size"]) != stat.st_size:
+                    return None
+                return WeatherDataBatch(entry["dates"], *(entry[column] for column in WeatherDataBatch.COLUMNS))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+
+    def store(self, file_path, batch):
+        """
+        Writes the WeatherDataBatch of a file to the cache. Failures are ignored, since the cache is only an
+        optimization.
+
+        Args:
+            file_path (str): Path to the weather data file.
+            batch (WeatherDataBatch): Parsed readings of the file.
+        """
+        import numpy as np
+
+        from weather_data import WeatherDataBatch
+
+        entry_path = self.__entry_path(file_path)
+        temporary_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            stat = os.stat(file_path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temporary_path, "wb") as entry:
+                np.savez(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size, dates=batch.dates,
+                         **{column: getattr(batch, column) for column in WeatherDataBatch.COLUMNS})
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def clear(self):
+        """
+        Removes every cache entry.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
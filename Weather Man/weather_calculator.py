@@ -9,13 +9,17 @@ Classes:
 
 """
 
-from collections import defaultdict
+from weather_aggregator import WeatherAggregator
+from weather_analytics import WeatherAnalytics
+from weather_data import WeatherData, WeatherDataBatch
 
 
 class WeatherCalculator:
     """
     A class to perform calculations on weather data and generate reports.
 
+    Every calculation makes a single pass over the weather data through a WeatherAggregator.
+
     Attributes:
         weather_data: Weather data containing temperature and humidity information.
 
@@ -25,6 +29,10 @@ class WeatherCalculator:
         calculate_monthly_averages(year, month): Calculates monthly averages (highest temperature, lowest temperature,
                                                 mean humidity) for the specified year and month.
         calculate_daily_temperatures(year, month): Retrieves daily temperatures for the specified year and month.
+        calculate_rolling_means(column, window): Calculates the mean of a measurement over every window of days.
+        calculate_monthly_percentiles(column, percentiles): Calculates percentiles of a measurement for every month.
+        calculate_anomalies(column): Calculates the deviation of each reading from the climatology of its day.
+        calculate_heat_waves(threshold, min_days): Finds streaks of consecutive days at or above a temperature.
     """
 
     def __init__(self, weather_data):
@@ -32,10 +40,29 @@ class WeatherCalculator:
         Initializes WeatherCalculator with weather data.
 
         Args:
-            weather_data (list): List of weather data objects containing temperature and humidity information.
+            weather_data (iterable): List of weather data objects containing temperature and humidity information, a
+                                     WeatherDataBatch, or any iterable of WeatherData and WeatherDataBatch objects
+                                     such as a parser generator. A generator can only serve one calculation.
         """
         self.weather_data = weather_data
 
+    def __aggregate(self, keep_daily=False):
+        """
+        Aggregates the weather data in a single pass.
+
+        Args:
+            keep_daily (bool): Keep the daily maximum and minimum temperatures.
+
+        Returns:
+            WeatherAggregator: The aggregator holding the results.
+        """
+        aggregator = WeatherAggregator(keep_daily=keep_daily)
+        if isinstance(self.weather_data, WeatherDataBatch):
+            aggregator.add_batch(self.weather_data)
+        else:
+            aggregator.consume(self.weather_data)
+        return aggregator
+
     def calculate_yearly_extremes(self, year):
         """
         Calculates yearly extremes (highest temperature, lowest temperature, most humid day) for the specified year.
@@ -46,29 +73,7 @@ class WeatherCalculator:
         Returns:
             WeatherCalculationResults: Object containing calculated extremes.
         """
-
-        year_data = self.weather_data
-        yearly_weather_extremes_calculation_results = defaultdict(lambda: defaultdict(int))
-        if not year_data:
-            return yearly_weather_extremes_calculation_results
-        highest_temp = None
-        lowest_temp = None
-        most_humid_day = None
-        for day in year_data:
-            if highest_temp is None or day.max_temperature > highest_temp.max_temperature:
-                highest_temp = day
-            if lowest_temp is None or day.min_temperature < lowest_temp.min_temperature:
-                lowest_temp = day
-            if most_humid_day is None or day.max_humidity > most_humid_day.max_humidity:
-                most_humid_day = day
-
-        yearly_weather_extremes_calculation_results["highest_temperature"]["temperature"] = highest_temp.max_temperature
-        yearly_weather_extremes_calculation_results["highest_temperature"]["date"] = highest_temp.date
-        yearly_weather_extremes_calculation_results["lowest_temperature"]["temperature"] = lowest_temp.min_temperature
-        yearly_weather_extremes_calculation_results["lowest_temperature"]["date"] = lowest_temp.date
-        yearly_weather_extremes_calculation_results["most_humid_day"]["humidity"] = most_humid_day.max_humidity
-        yearly_weather_extremes_calculation_results["most_humid_day"]["date"] = most_humid_day.date
-        return yearly_weather_extremes_calculation_results
+        return self.__aggregate().yearly_extremes()
 
     def calculate_monthly_averages(self, year, month):
         """
@@ -82,24 +87,7 @@ class WeatherCalculator:
         Returns:
             WeatherCalculationResults: Object containing calculated averages.
         """
-
-        month_data = self.weather_data
-        monthly_average_weather_calculation_results = defaultdict(float)
-
-        if not month_data:
-            return monthly_average_weather_calculation_results
-
-        monthly_average_weather_calculation_results["average_highest_temperature"] = (
-                sum(day_data.max_temperature for day_data in month_data) / len(month_data)
-        )
-        monthly_average_weather_calculation_results["average_lowest_temperature"] = (
-                sum(day_data.min_temperature for day_data in month_data) / len(month_data)
-        )
-        monthly_average_weather_calculation_results["average_mean_humidity"] = (
-                sum(day_data.mean_humidity for day_data in month_data) / len(month_data)
-        )
-
-        return monthly_average_weather_calculation_results
+        return self.__aggregate().monthly_averages()
 
     def calculate_daily_temperatures(self, year, month):
         """
@@ -112,14 +100,79 @@ class WeatherCalculator:
         Returns:
             WeatherCalculationResults: dictionary containing daily temperatures.
         """
-        month_data = self.weather_data
-        weather_calculation_results = defaultdict(lambda: defaultdict(float))
+        return self.__aggregate(keep_daily=True).daily_temperatures()
+
+    def __analytics(self):
+        """
+        Joins the weather data into one WeatherDataBatch for the vectorized statistics.
+
+        Returns:
+            WeatherAnalytics: The analytics engine over the weather data.
+        """
+        if isinstance(self.weather_data, WeatherDataBatch):
+            return WeatherAnalytics(self.weather_data)
+        batches = []
+        readings = []
+        for reading in self.weather_data:
+            if isinstance(reading, WeatherData):
+                readings.append(reading)
+            else:
+                batches.append(reading)
+        if readings:
+            batches.append(WeatherDataBatch([reading.date for reading in readings],
+                                            *([getattr(reading, column) for reading in readings]
+                                              for column in WeatherDataBatch.COLUMNS)))
+        return WeatherAnalytics(WeatherDataBatch.concatenate(batches))
+
+    def calculate_rolling_means(self, column="max_temperature", window=7):
+        """
+        Calculates the mean of a measurement over every window of consecutive calendar days.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+            window (int): Number of days in a window.
+
+        Returns:
+            dict: Dictionary holding the 'dates' ending each window and their 'means'; NaN where a day is missing.
+        """
+        return self.__analytics().rolling_means(column, window)
 
-        if not month_data:
-            return weather_calculation_results
+    def calculate_monthly_percentiles(self, column="max_temperature", percentiles=(10, 50, 90)):
+        """
+        Calculates percentiles of a measurement for every month of the weather data.
 
-        for day_data in month_data:
-            weather_calculation_results[day_data.date]["max_temperature"] = day_data.max_temperature
-            weather_calculation_results[day_data.date]["min_temperature"] = day_data.min_temperature
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+            percentiles (tuple): Percentiles between 0 and 100.
 
-        return weather_calculation_results
+        Returns:
+            defaultdict: Dictionary mapping (year, month) tuples to dictionaries of percentile values.
+        """
+        return self.__analytics().monthly_percentiles(column, percentiles)
+
+    def calculate_anomalies(self, column="max_temperature"):
+        """
+        Calculates how far each reading is from the mean of the measurement on the same calendar day over all
+        years of the weather data.
+
+        Args:
+            column (str): Name of the measurement, e.g. 'max_temperature'.
+
+        Returns:
+            dict: Dictionary holding the 'dates', the 'climatology' of each date and the 'anomalies'.
+        """
+        return self.__analytics().climatology_anomalies(column)
+
+    def calculate_heat_waves(self, threshold=40.0, min_days=3):
+        """
+        Finds the streaks of at least min_days consecutive days whose maximum temperature is at or above the
+        threshold.
+
+        Args:
+            threshold (float): The lowest maximum temperature of a hot day.
+            min_days (int): The fewest consecutive hot days that make a heat wave.
+
+        Returns:
+            list: One dictionary per heat wave with its 'start', 'end', number of 'days' and 'peak' temperature.
+        """
+        return self.__analytics().heat_waves(threshold, min_days)
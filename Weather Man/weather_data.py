@@ -6,9 +6,12 @@ temperature, and humidity.
 
 Classes:
 - WeatherData: A class to represent weather data for a specific date, including temperatures and humidity levels.
+- WeatherDataBatch: A columnar batch of weather readings, one typed array per attribute.
 
 """
 
+import numpy as np
+
 
 class WeatherData:
     """
@@ -27,6 +30,9 @@ class WeatherData:
     - __str__(): Returns a string representation of the weather data.
     """
 
+    __slots__ = ("date", "max_temperature", "mean_temperature", "min_temperature", "max_humidity", "mean_humidity",
+                 "min_humidity")
+
     def __init__(self, date, max_temp, mean_temp, min_temp, max_humidity, mean_humidity, min_humidity):
         """
         Initializes a WeatherData instance with the provided attributes.
@@ -57,3 +63,154 @@ class WeatherData:
         """
 
         return f'{self.date}, {self.max_temperature}, {self.mean_temperature}, {self.min_temperature}, {self.max_humidity}, {self.mean_humidity}, {self.min_humidity}'
+
+
+class WeatherDataBatch:
+    """
+    A class to represent many weather readings as columns instead of one object per day.
+
+    Measurements are float64 values; batches sliced from a WeatherArchive are views of its float64 columns.
+
+    Attributes:
+    - dates (numpy.ndarray): The dates of the readings as datetime64[D] values.
+    - max_temperature (numpy.ndarray): The maximum temperatures as float64 values.
+    - mean_temperature (numpy.ndarray): The mean temperatures as float64 values.
+    - min_temperature (numpy.ndarray): The minimum temperatures as float64 values.
+    - max_humidity (numpy.ndarray): The maximum humidity values as float64 values.
+    - mean_humidity (numpy.ndarray): The mean humidity values as float64 values.
+    - min_humidity (numpy.ndarray): The minimum humidity values as float64 values.
+
+    Methods:
+    - concatenate(batches): Joins several batches into one, keeping their order.
+    - date_at(index): Returns the date at the given position as a datetime.
+    - nbytes: The number of bytes held by the arrays of the batch.
+    - __len__(): Returns the number of readings in the batch.
+    - __getitem__(index): Returns the reading at the given position as a WeatherData object.
+    - __iter__(): Yields the readings of the batch as WeatherData objects.
+    """
+
+    COLUMNS = ("max_temperature", "mean_temperature", "min_temperature", "max_humidity", "mean_humidity",
+               "min_humidity")
+
+    __slots__ = ("dates",) + COLUMNS
+
+    def __init__(self, dates, max_temp, mean_temp, min_temp, max_humidity, mean_humidity, min_humidity):
+        """
+        Initializes a WeatherDataBatch instance with one array per attribute.
+
+        Args:
+            dates (array-like): The dates of the readings.
+            max_temp (array-like): The maximum temperatures.
+            mean_temp (array-like): The mean temperatures.
+            min_temp (array-like): The minimum temperatures.
+            max_humidity (array-like): The maximum humidity values.
+            mean_humidity (array-like): The mean humidity values.
+            min_humidity (array-like): The minimum humidity values.
+        """
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.max_temperature = self.__floats(max_temp)
+        self.mean_temperature = self.__floats(mean_temp)
+        self.min_temperature = self.__floats(min_temp)
+        self.max_humidity = self.__floats(max_humidity)
+        self.mean_humidity = self.__floats(mean_humidity)
+        self.min_humidity = self.__floats(min_humidity)
+
+    @staticmethod
+    def __floats(values):
+        """
+        Returns values as a float array. Float arrays, such as slices of a memory-mapped archive, are kept as they
+        are instead of being copied.
+
+        Args:
+            values (array-like): The values of one attribute.
+
+        Returns:
+            numpy.ndarray: The values as a float array.
+        """
+        values = np.asarray(values)
+        return values if values.dtype.kind == "f" else values.astype(np.float64)
+
+    @classmethod
+    def empty(cls):
+        """
+        Creates a batch without any readings.
+
+        Returns:
+            WeatherDataBatch: An empty batch.
+        """
+        return cls(*([[]] * (len(cls.COLUMNS) + 1)))
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        Joins several batches into one, keeping their order.
+
+        Args:
+            batches (list): List of WeatherDataBatch objects.
+
+        Returns:
+            WeatherDataBatch: A batch holding the readings of all given batches.
+        """
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        dates = np.concatenate([batch.dates for batch in batches])
+        columns = [np.concatenate([getattr(batch, column) for batch in batches]) for column in cls.COLUMNS]
+        return cls(dates, *columns)
+
+    def date_at(self, index):
+        """
+        Returns the date at the given position as a datetime.
+
+        Args:
+            index (int): Position of the reading in the batch.
+
+        Returns:
+            datetime: The date of the reading.
+        """
+        return self.dates[index].astype("datetime64[s]").item()
+
+    @property
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the arrays of the batch.
+
+        Returns:
+            int: The size of the arrays in bytes.
+        """
+        return self.dates.nbytes + sum(getattr(self, column).nbytes for column in self.COLUMNS)
+
+    def __len__(self):
+        """
+        Returns the number of readings in the batch.
+
+        Returns:
+            int: The number of readings.
+        """
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        """
+        Returns the reading at the given position as a WeatherData object, so a batch can be used wherever a list
+        of WeatherData is expected.
+
+        Args:
+            index (int): Position of the reading in the batch.
+
+        Returns:
+            WeatherData: The reading at the position.
+        """
+        return WeatherData(self.date_at(index), *(float(getattr(self, column)[index]) for column in self.COLUMNS))
+
+    def __iter__(self):
+        """
+        Yields the readings of the batch as WeatherData objects.
+
+        Yields:
+            WeatherData: The readings in batch order.
+        """
+        dates = self.dates.astype("datetime64[s]").tolist()
+        columns = [getattr(self, column).tolist() for column in self.COLUMNS]
+        for date, *values in zip(dates, *columns):
+            yield WeatherData(date, *values)
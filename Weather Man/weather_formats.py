@@ -0,0 +1,168 @@
+"""
+weather_formats.py
+
+This module defines the WeatherResultWriter class, which writes the result dictionaries of WeatherCalculator in a
+machine-readable format, so downstream jobs do not have to parse the text reports.
+
+Every format describes results as the same long table with one row per value:
+station, command, period, metric, date (empty for averages) and value. The json format instead writes one JSON
+object per command and line, holding the station and the result dictionary itself.
+
+Classes:
+- WeatherResultWriter: A class to write calculation results as JSON lines, CSV or an Arrow IPC stream.
+
+"""
+
+import csv
+import json
+from datetime import datetime
+
+from constants import COMMANDS, DEFAULT_STATION
+
+RESULT_COLUMNS = ("station", "command", "period", "metric", "date", "value")
+
+
+class WeatherResultWriter:
+    """
+    A class to write calculation results as JSON lines, CSV or an Arrow IPC stream.
+
+    Results are written as soon as they are given, except that the CSV header and the Arrow schema are written
+    with the first result. The Arrow stream holds one record batch per command, whose value column is built from
+    a float64 NumPy array, so pyarrow and pandas can hand it over without copying it.
+
+    Attributes:
+        stream (file): Text stream the results are written to; the Arrow format writes to its binary buffer.
+        output_format (str): One of 'json', 'csv' and 'arrow'.
+        station (str): The station the results belong to.
+
+    Methods:
+        write(command, period, results): Writes the results of one command.
+        close(): Finishes the output.
+    """
+
+    def __init__(self, stream, output_format, station=DEFAULT_STATION):
+        """
+        Initializes WeatherResultWriter.
+
+        Args:
+            stream (file): Text stream the results are written to.
+            output_format (str): One of 'json', 'csv' and 'arrow'.
+            station (str): The station the results belong to.
+        """
+        self.stream = stream
+        self.output_format = output_format
+        self.station = station
+        self.__csv_writer = None
+        self.__arrow_writer = None
+
+    @staticmethod
+    def __rows(command, period, results):
+        """
+        Yields the rows of the long result table for the results of one command.
+
+        Args:
+            command (str): The command, e.g. '-e'.
+            period (str): The year, month or range given with the command.
+            results (dict): The result dictionary returned by WeatherCalculator.
+
+        Yields:
+            tuple: (command, period, metric, date, value) rows; date is None for averages.
+        """
+        if command == COMMANDS.get("get_yearly_extreme_weather_values"):
+            for metric, extreme in results.items():
+                value = extreme.get("humidity") if metric == "most_humid_day" else extreme.get("temperature")
+                yield command, period, metric, extreme.get("date"), value
+        elif command == COMMANDS.get("get_yearly_average_weather_values"):
+            for metric, value in results.items():
+                yield command, period, metric, None, value
+        else:
+            for date, daily_temps in results.items():
+                yield command, period, "max_temperature", date, daily_temps.get("max_temperature")
+                yield command, period, "min_temperature", date, daily_temps.get("min_temperature")
+
+    @classmethod
+    def __jsonable(cls, value):
+        """
+        Returns a value with its dictionary keys and dates converted to ISO strings, so it can be dumped as JSON.
+
+        Args:
+            value: A result dictionary or one of its values.
+
+        Returns:
+            The converted value.
+        """
+        if isinstance(value, dict):
+            return {cls.__jsonable(key): cls.__jsonable(item) for key, item in value.items()}
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        return value
+
+    def write(self, command, period, results):
+        """
+        Writes the results of one command.
+
+        Args:
+            command (str): The command, e.g. '-e'.
+            period (str): The year, month or range given with the command.
+            results (dict): The result dictionary returned by WeatherCalculator.
+        """
+        if self.output_format == "json":
+            document = {"station": self.station, "command": command, "period": period,
+                        "results": self.__jsonable(results)}
+            self.stream.write(json.dumps(document) + "\n")
+        elif self.output_format == "csv":
+            if self.__csv_writer is None:
+                self.__csv_writer = csv.writer(self.stream, lineterminator="\n")
+                self.__csv_writer.writerow(RESULT_COLUMNS)
+            self.__csv_writer.writerows(
+                (self.station, row_command, row_period, metric, date.date().isoformat() if date else "", value)
+                for row_command, row_period, metric, date, value in self.__rows(command, period, results))
+        else:
+            self.__write_arrow(command, period, results)
+
+    def __write_arrow(self, command, period, results):
+        """
+        Writes the results of one command as a record batch of the Arrow IPC stream.
+
+        Args:
+            command (str): The command, e.g. '-e'.
+            period (str): The year, month or range given with the command.
+            results (dict): The result dictionary returned by WeatherCalculator.
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        rows = list(self.__rows(command, period, results))
+        if not rows:
+            return
+        _, _, metrics, dates, values = zip(*rows)
+        batch = pa.record_batch([
+            pa.array([self.station] * len(rows), pa.string()),
+            pa.array([command] * len(rows), pa.string()),
+            pa.array([period] * len(rows), pa.string()),
+            pa.array(metrics, pa.string()),
+            pa.array(np.array(dates, dtype="datetime64[s]").astype("datetime64[ms]"),
+                     mask=np.array([date is None for date in dates])),
+            pa.array(np.array(values, dtype=np.float64)),
+        ], names=list(RESULT_COLUMNS))
+        if self.__arrow_writer is None:
+            sink = getattr(self.stream, "buffer", self.stream)
+            self.stream.flush()
+            self.__arrow_writer = pa.ipc.new_stream(sink, batch.schema)
+        self.__arrow_writer.write_batch(batch)
+
+    def close(self):
+        """
+        Finishes the output: ends the Arrow stream, which is written even when no results were given.
+        """
+        if self.output_format != "arrow":
+            return
+        import pyarrow as pa
+
+        if self.__arrow_writer is None:
+            schema = pa.schema([("station", pa.string()), ("command", pa.string()), ("period", pa.string()),
+                                ("metric", pa.string()), ("date", pa.timestamp("ms")), ("value", pa.float64())])
+            self.stream.flush()
+            self.__arrow_writer = pa.ipc.new_stream(getattr(self.stream, "buffer", self.stream), schema)
+        self.__arrow_writer.close()
+        self.stream.flush()
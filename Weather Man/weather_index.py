@@ -0,0 +1,204 @@
+"""
+weather_index.py
+
+This module defines the WeatherFileIndex class, which maps each (year, month) to the weather data files of one
+station holding its readings, so that a directory only has to be listed once per invocation. Weather data files are
+named <station>_weather_<year>_<Mon>, so one directory can hold the files of many stations.
+
+Classes:
+- WeatherFileIndex: A class to look up weather data files by year and month.
+
+Functions:
+- parse_file_name(filename, station): Extracts the year and month from the name of a weather data file of a station.
+- parse_station(filename): Extracts the station from the name of a weather data file.
+- discover_stations(files_dir): Returns the stations that have weather data files in a directory.
+- station_key(files_dir, station): Returns the key under which data derived from a station's files is cached.
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from constants import DEFAULT_STATION, MONTH_NUMBERS, STATION_FILE_INFIX
+
+
+def parse_file_name(filename, station=DEFAULT_STATION):
+    """
+    Extracts the year and month from the name of a weather data file, e.g. 'lahore_weather_2005_Jun.txt'.
+
+    Args:
+        filename (str): Name of the file.
+        station (str): Station the file must belong to.
+
+    Returns:
+        tuple: The year and month (1-12) of the file, or None when the name is not a weather data file name of the
+        station.
+    """
+    prefix = f"{station}{STATION_FILE_INFIX}"
+    if not filename.startswith(prefix):
+        return None
+    parts = os.path.splitext(filename[len(prefix):])[0].split('_')
+    if len(parts) < 2 or not parts[0].isdigit():
+        return None
+    month = MONTH_NUMBERS.get(parts[1][:3])
+    if month is None:
+        return None
+    return int(parts[0]), month
+
+
+def parse_station(filename):
+    """
+    Extracts the station from the name of a weather data file, e.g. 'karachi' from 'karachi_weather_2005_Jun.txt'.
+
+    Args:
+        filename (str): Name of the file.
+
+    Returns:
+        str: The station of the file, or None when the name is not a weather data file name.
+    """
+    station = filename.split(STATION_FILE_INFIX, 1)[0]
+    if station == filename or not station or parse_file_name(filename, station) is None:
+        return None
+    return station
+
+
+def discover_stations(files_dir):
+    """
+    Returns the stations that have weather data files in a directory.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+
+    Returns:
+        list: The sorted station names.
+    """
+    return sorted({station for station in map(parse_station, os.listdir(files_dir)) if station})
+
+
+def station_key(files_dir, station):
+    """
+    Returns the key under which indexes, summary tables and archives derived from a station's files are cached.
+
+    Args:
+        files_dir (str): Directory path where weather data files are located.
+        station (str): The station.
+
+    Returns:
+        str: A hex digest of the directory's absolute path and the station.
+    """
+    return hashlib.sha1(f"{os.path.abspath(files_dir)}:{station}".encode()).hexdigest()
+
+
+class WeatherFileIndex:
+    """
+    A class to look up the weather data files of one station by year and month.
+
+    Attributes:
+        files_dir (str): Directory path where weather data files are located.
+        entries (dict): Dictionary mapping (year, month) tuples to the sorted file names of that month.
+        station (str): The station whose files are indexed.
+
+    Methods:
+        build(files_dir, station): Lists files_dir once and indexes every weather data file of the station in it.
+        load(files_dir, index_dir, station): Returns the index saved in index_dir, or builds and saves a new one
+                                             when the directory changed since.
+        files_for_year(year): Returns the paths of all files for a year, in month order.
+        files_for_month(year, month): Returns the paths of all files for a month.
+    """
+
+    def __init__(self, files_dir, entries, station=DEFAULT_STATION):
+        """
+        Initializes WeatherFileIndex with the directory and its indexed files.
+
+        Args:
+            files_dir (str): Directory path where weather data files are located.
+            entries (dict): Dictionary mapping (year, month) tuples to lists of file names.
+            station (str): The station whose files are indexed.
+        """
+        self.files_dir = files_dir
+        self.entries = entries
+        self.station = station
+
+    @classmethod
+    def build(cls, files_dir, station=DEFAULT_STATION):
+        """
+        Lists files_dir once and indexes every weather data file of a station in it.
+
+        Args:
+            files_dir (str): Directory path where weather data files are located.
+            station (str): The station whose files are indexed.
+
+        Returns:
+            WeatherFileIndex: The index of the directory.
+        """
+        entries = defaultdict(list)
+        for filename in sorted(os.listdir(files_dir)):
+            year_month = parse_file_name(filename, station)
+            if year_month:
+                entries[year_month].append(filename)
+        return cls(files_dir, dict(entries), station)
+
+    @classmethod
+    def load(cls, files_dir, index_dir, station=DEFAULT_STATION):
+        """
+        Returns the index saved in index_dir for files_dir. The saved index is only used while the directory's
+        mtime is unchanged, which is the case until files are added, removed or renamed; otherwise a new index is
+        built and saved.
+
+        Args:
+            files_dir (str): Directory path where weather data files are located.
+            index_dir (str): Directory path where indexes are saved.
+            station (str): The station whose files are indexed.
+
+        Returns:
+            WeatherFileIndex: The index of the directory.
+        """
+        mtime_ns = os.stat(files_dir).st_mtime_ns
+        index_path = os.path.join(index_dir, f"{station_key(files_dir, station)}.index.json")
+        try:
+            with open(index_path) as index_file:
+                saved_index = json.load(index_file)
+            if saved_index.get("mtime_ns") == mtime_ns:
+                entries = defaultdict(list)
+                for year, month, filename in saved_index.get("files"):
+                    entries[(year, month)].append(filename)
+                return cls(files_dir, dict(entries), station)
+        except (OSError, ValueError, TypeError):
+            pass
+
+        index = cls.build(files_dir, station)
+        files = [[year, month, filename] for (year, month), filenames in index.entries.items()
+                 for filename in filenames]
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            with open(index_path, "w") as index_file:
+                json.dump({"mtime_ns": mtime_ns, "files": files}, index_file)
+        except OSError:
+            pass
+        return index
+
+    def files_for_year(self, year):
+        """
+        Returns the paths of all files for a year, in month order.
+
+        Args:
+            year (int): Year of the files.
+
+        Returns:
+            list: Paths of the files.
+        """
+        return [path for month in range(1, 13) for path in self.files_for_month(year, month)]
+
+    def files_for_month(self, year, month):
+        """
+        Returns the paths of all files for a month.
+
+        Args:
+            year (int): Year of the files.
+            month (int): Month (1-12) of the files.
+
+        Returns:
+            list: Paths of the files.
+        """
+        return [os.path.join(self.files_dir, filename) for filename in self.entries.get((year, month), [])]
@@ -7,15 +7,37 @@ Pakistan.
 Classes:
 - WeatherParser: A class to parse weather data files year-wise and month-wise from a specified directory.
 
+Functions:
+- parse_file_in_worker(parser, file_path): Parses a file in a worker process and returns its readings and counts.
+
 """
 
+import csv
 import os
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from constants import CSV_CHUNK_ROWS, CSV_FAST_PATH_MAX_BYTES, DATE_COLUMNS, DEFAULT_STATION, MEASUREMENT_COLUMNS
+from weather_data import WeatherDataBatch
+from weather_index import WeatherFileIndex
+from weather_profiler import profile_stage
+from weather_validation import WeatherValidator
 
-import pandas as pd
 
-from constants import MONTH_MAP
-from weather_data import WeatherData
+def parse_file_in_worker(parser, file_path):
+    """
+    Parses a weather data file in a worker process. The reject counts of the file are returned with its readings,
+    since they are recorded in the worker's copy of the validator and would otherwise never reach the parent.
+
+    Args:
+        parser (WeatherParser): Columnar parser of the worker.
+        file_path (str): Path to the CSV file containing weather data.
+
+    Returns:
+        tuple: The WeatherDataBatch of the file and its counts, as kept in WeatherValidator.files.
+    """
+    batch = parser.parse_file_columnar(file_path)
+    return batch, parser.validator.files.get(file_path)
 
 
 class WeatherParser:
@@ -24,61 +46,380 @@ class WeatherParser:
 
         Attributes:
             files_dir (str): Directory path where weather data files are located.
+            columnar (bool): Whether files are parsed into WeatherDataBatch objects instead of WeatherData lists.
+            cache (WeatherCache): Optional cache of already parsed files, used by the columnar mode.
+            index (WeatherFileIndex): Index of the weather data files in files_dir, built on first use when not given.
+            store (WeatherReadingStore): Optional in-memory store of files already parsed in this invocation.
+            workers (int): Number of processes used to parse several files at once in columnar mode.
+            profiler (WeatherProfiler): Optional profiler recording the index, read_csv, parse and cache stages.
+            archive (WeatherArchive): Optional memory-mapped archive of files_dir, used by the columnar mode.
+            station (str): Station whose files are read from files_dir.
+            validator (WeatherValidator): Validator converting the raw columns of every parsed file.
 
         Methods:
+            parse_file(file_path): Parses a single weather data file.
+            parse_file_columnar(file_path): Parses a single weather data file into a WeatherDataBatch.
+            iter_file_chunks(file_path, chunk_rows): Yields the readings of a weather data file in bounded chunks.
             parse_files_year_wise(year): Parses all weather data files for a specific year.
             parse_files_month_wise(year, month): Parses all weather data files for a specific month in a year.
+            iter_files_year_wise(year): Yields the readings for a specific year one file at a time.
+            iter_files_month_wise(year, month): Yields the readings for a specific month one file at a time.
+            iter_months(months): Yields the readings of several months one month at a time, parsing them together.
         """
 
-    def __init__(self, files_dir):
+    def __init__(self, files_dir, columnar=False, cache=None, index=None, store=None, workers=1, profiler=None,
+                 archive=None, station=DEFAULT_STATION, validator=None):
         """
         Initializes WeatherParser with the directory containing weather data files.
 
         Args:
             files_dir (str): Directory path where weather data files are located.
+            columnar (bool): Parse files into WeatherDataBatch objects instead of lists of WeatherData.
+            cache (WeatherCache): Cache consulted before a file is parsed in columnar mode, and filled afterwards.
+            index (WeatherFileIndex): Index of the weather data files in files_dir. When omitted, the directory is
+                                      listed once, the first time files are looked up.
+            store (WeatherReadingStore): In-memory store consulted before the cache in columnar mode, so files shared
+                                         by several queries are read only once.
+            workers (int): Number of processes used to parse the files of one query in columnar mode. With 1, files
+                           are parsed one after another in this process.
+            profiler (WeatherProfiler): Profiler recording the stages of this parser. Files parsed by worker
+                                        processes are recorded as a single parallel stage.
+            archive (WeatherArchive): Memory-mapped archive of files_dir. In columnar mode, the month-wise and
+                                      year-wise methods slice unchanged months out of it instead of reading files.
+            station (str): Station whose files are read from files_dir.
+            validator (WeatherValidator): Validator counting and quarantining the rejected rows of parsed files. By
+                                          default, rejects are only summarized on standard error.
         """
 
         self.files_dir = files_dir
+        self.columnar = columnar
+        self.cache = cache
+        self.store = store
+        self.workers = workers
+        self.profiler = profiler
+        self.archive = archive
+        self.station = station
+        self.validator = validator if validator is not None else WeatherValidator()
+        self.__index = index
+
+    @property
+    def index(self):
+        """
+        Returns the index of the weather data files in files_dir, building it on first use.
+
+        Returns:
+            WeatherFileIndex: The index of files_dir.
+        """
+        if self.__index is None:
+            with profile_stage(self.profiler, "index"):
+                self.__index = WeatherFileIndex.build(self.files_dir, self.station)
+        return self.__index
+
+    @index.setter
+    def index(self, index):
+        """
+        Replaces the index of the weather data files, e.g. after files were added to or removed from files_dir.
+
+        Args:
+            index (WeatherFileIndex): The new index of files_dir.
+        """
+        self.__index = index
+
+    def __csv_columns(self, file_path):
+        """
+        Reads the header of a CSV file and returns the names, as spelled in the file, of the date column and the six
+        measurement columns, so pandas only has to read those.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+
+        Returns:
+            list: The raw name of the date column followed by the raw names of the measurement columns.
+        """
+        with open(file_path, newline="") as csv_file:
+            header = next((row for row in csv.reader(csv_file) if row), [])
+        raw_names = {column.strip(): column for column in header}
+        date_col = next((column for column in DATE_COLUMNS if column in raw_names), None)
+        missing_columns = [column for column in (date_col, *MEASUREMENT_COLUMNS) if column not in raw_names]
+        if missing_columns:
+            raise KeyError(f"{missing_columns} not in {file_path}")
+        return [raw_names[column] for column in (date_col, *MEASUREMENT_COLUMNS)]
 
     def parse_file(self, file_path):
         """
-        Parses a CSV file containing weather data and returns a WeatherData object.
+        Parses a CSV file containing weather data. The file is validated as in parse_file_columnar; when the parser
+        is not columnar, the valid readings are then turned into WeatherData objects.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+
+        Returns:
+            list: List of WeatherData objects containing the parsed weather readings of the file, or a
+            WeatherDataBatch when the parser is columnar.
+        """
+        if self.columnar:
+            return self.parse_file_columnar(file_path)
+
+        return list(self.__parse_csv_columnar(file_path))
+
+    def parse_file_columnar(self, file_path):
+        """
+        Parses a CSV file containing weather data into a single WeatherDataBatch.
+
+        The columns are converted and validated in vectorized passes by the parser's validator, so no per-row
+        Python objects are created. Rows with a missing or malformed value are rejected. Readings are
+        looked up in the parser's store and then its cache before the CSV file is read, and are added to both.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+
+        Returns:
+            WeatherDataBatch: A batch containing the parsed weather readings of the file.
+        """
+        batch = self.__find_parsed(file_path)
+        if batch is None:
+            batch = self.__parse_csv_columnar(file_path)
+            self.__keep_parsed(file_path, batch)
+        return batch
+
+    def __find_parsed(self, file_path):
+        """
+        Looks up the readings of a file in the store and then in the cache. Readings found in the cache are added
+        to the store.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+
+        Returns:
+            WeatherDataBatch: The readings of the file, or None when the file still has to be parsed.
+        """
+        if self.store is not None:
+            batch = self.store.get(file_path)
+            if batch is not None:
+                return batch
+
+        if self.cache is None:
+            return None
+        with profile_stage(self.profiler, "cache") as stage:
+            batch = self.cache.load(file_path)
+            if batch is not None:
+                stage["files"] += 1
+                stage["rows"] += len(batch)
+        if batch is not None and self.store is not None:
+            self.store.put(file_path, batch)
+        return batch
+
+    def __keep_parsed(self, file_path, batch):
+        """
+        Adds freshly parsed readings of a file to the cache and the store.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+            batch (WeatherDataBatch): Parsed readings of the file.
+        """
+        if self.cache is not None:
+            with profile_stage(self.profiler, "cache"):
+                self.cache.store(file_path, batch)
+        if self.store is not None:
+            self.store.put(file_path, batch)
+
+    def __parse_csv_columnar(self, file_path):
+        """
+        Parses a CSV file into a WeatherDataBatch without consulting the cache. Files up to CSV_FAST_PATH_MAX_BYTES
+        are read with the csv module, which is faster than pandas for a month of readings; larger files go through
+        pandas.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+
+        Returns:
+            WeatherDataBatch: A batch containing the parsed weather readings of the file.
+        """
+        if os.path.getsize(file_path) <= CSV_FAST_PATH_MAX_BYTES:
+            return self.__parse_small_csv(file_path)
+        return WeatherDataBatch.concatenate(list(self.iter_file_chunks(file_path)))
+
+    def iter_file_chunks(self, file_path, chunk_rows=CSV_CHUNK_ROWS):
+        """
+        Yields the readings of a CSV file as WeatherDataBatch objects of at most chunk_rows readings each. Only the
+        seven required columns are read, all as str, and at most one chunk of the file is held at a time, so memory
+        stays bounded however large the file is. Rows are kept or rejected as in parse_file_columnar, and the
+        summary line of the file is printed once its last chunk was read.
+
+        This is the way to read a consolidated feed holding many years of readings in one file. Such a file does not
+        follow the <station>_weather_<year>_<Mon> naming of the files directory, so the month-wise and year-wise
+        methods and the command line never read it; the chunks hold every date of the file, in file order, and it
+        is up to the caller to select the dates it needs, e.g. WeatherAggregator().consume(chunks) over the whole
+        feed.
+
+        Args:
+            file_path (str): Path to the CSV file containing weather data.
+            chunk_rows (int): Number of CSV rows read per chunk.
+
+        Yields:
+            WeatherDataBatch: The readings of one chunk of the file.
+        """
+        import pandas as pd
+
+        columns = self.__csv_columns(file_path)
+        self.validator.start_file(file_path)
+        first_row = 1
+        with pd.read_csv(file_path, usecols=columns, dtype=dict.fromkeys(columns, str), chunksize=chunk_rows) as reader:
+            while True:
+                with profile_stage(self.profiler, "read_csv") as stage:
+                    data = next(reader, None)
+                    if data is None:
+                        break
+                    stage["rows"] += len(data)
+                with profile_stage(self.profiler, "parse") as stage:
+                    raw_columns = data[columns].fillna("").to_numpy(dtype=object).T
+                    batch = self.validator.validate(file_path, columns[0].strip(), raw_columns, first_row)
+                    stage["rows"] += len(batch)
+                first_row += len(data)
+                yield batch
+        self.validator.finish_file(file_path)
+
+    def __parse_small_csv(self, file_path):
+        """
+        Parses a small CSV file into a WeatherDataBatch with the csv module. Blank lines are skipped, short rows are
+        padded with missing values, and the columns are validated as in the pandas path.
 
         Args:
             file_path (str): Path to the CSV file containing weather data.
 
         Returns:
-            Object: A WeatherData object containing parsed weather weather_reading.
-        """
-        weather_reading = []
-        data = pd.read_csv(file_path)
-        data.columns = data.columns.str.strip()
-        date_col = None
-        if "PKT" in data.columns:
-            date_col = "PKT"
-        elif "PKST" in data.columns:
-            date_col = "PKST"
-
-        required_cols = [date_col, "Max TemperatureC", "Mean TemperatureC", "Min TemperatureC", "Max Humidity",
-                         "Mean Humidity",
-                         "Min Humidity"]
-        data = data[required_cols]
-        data.dropna(inplace=True)
-        for index, row in data.iterrows():
-            try:
-                date = datetime.strptime(row[f"{date_col}"], "%Y-%m-%d")
-                max_temp = float(row.get("Max TemperatureC", 0))
-                mean_temp = float(row.get("Mean TemperatureC", 0))
-                min_temp = float(row.get("Min TemperatureC", 0))
-                max_humidity = float(row.get("Max Humidity", 0))
-                mean_humidity = float(row.get("Mean Humidity", 0))
-                min_humidity = float(row.get("Min Humidity", 0))
-                reading = WeatherData(date, max_temp, mean_temp, min_temp, max_humidity, mean_humidity, min_humidity)
-                weather_reading.append(reading)
-            except ValueError as e:
-                print(f"Error processing row {index}: {e}")
-                continue
-        return weather_reading
+            WeatherDataBatch: A batch containing the parsed weather readings of the file.
+        """
+        with profile_stage(self.profiler, "read_csv") as stage:
+            with open(file_path, newline="") as csv_file:
+                rows = [row for row in csv.reader(csv_file) if row]
+            stage["files"] += 1
+            stage["rows"] += max(len(rows) - 1, 0)
+
+        with profile_stage(self.profiler, "parse") as stage:
+            header = [column.strip() for column in rows[0]] if rows else []
+            date_col = next((column for column in DATE_COLUMNS if column in header), None)
+            missing_columns = [column for column in (date_col, *MEASUREMENT_COLUMNS) if column not in header]
+            if missing_columns:
+                raise KeyError(f"{missing_columns} not in {file_path}")
+
+            width = len(header)
+            data_rows = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows[1:]]
+            file_columns = list(zip(*data_rows)) or [()] * width
+            raw_columns = [file_columns[header.index(column)] for column in (date_col, *MEASUREMENT_COLUMNS)]
+            self.validator.start_file(file_path)
+            batch = self.validator.validate(file_path, date_col, raw_columns)
+            self.validator.finish_file(file_path)
+            stage["rows"] += len(batch)
+        return batch
+
+    def __parse_files(self, file_paths):
+        """
+        Parses the given weather data files and joins their readings, keeping the order of the paths.
+
+        Args:
+            file_paths (list): Paths to the weather data files.
+
+        Returns:
+            list or WeatherDataBatch: Parsed weather readings of all files.
+        """
+        if self.columnar and self.workers > 1:
+            return WeatherDataBatch.concatenate(self.__parse_files_in_parallel(file_paths))
+
+        readings = [self.parse_file(file_path) for file_path in file_paths]
+        if self.columnar:
+            return WeatherDataBatch.concatenate(readings)
+        return [reading for file_readings in readings for reading in file_readings]
+
+    def __parse_files_in_parallel(self, file_paths):
+        """
+        Parses the given weather data files into WeatherDataBatch objects using a pool of worker processes.
+        Files found in the store or cache are not sent to the pool. The batches are returned in the order of the
+        paths, so the result is the same as parsing the files one after another, and the reject counts of the files
+        are recorded in this parser's validator.
+
+        Args:
+            file_paths (list): Paths to the weather data files.
+
+        Returns:
+            list: WeatherDataBatch objects, one per path.
+        """
+        batches = {file_path: self.__find_parsed(file_path) for file_path in file_paths}
+        missing_paths = [file_path for file_path, batch in batches.items() if batch is None]
+        if len(missing_paths) > 1:
+            worker_parser = WeatherParser(self.files_dir, columnar=True, validator=self.validator)
+            with profile_stage(self.profiler, "parallel") as stage:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(missing_paths))) as executor:
+                    parsed_files = list(executor.map(partial(parse_file_in_worker, worker_parser), missing_paths))
+                parsed_batches = [batch for batch, counts in parsed_files]
+                for file_path, (_, counts) in zip(missing_paths, parsed_files):
+                    self.validator.record_file(file_path, counts)
+                stage["files"] += len(missing_paths)
+                stage["rows"] += sum(len(batch) for batch in parsed_batches)
+        else:
+            parsed_batches = [self.__parse_csv_columnar(file_path) for file_path in missing_paths]
+
+        for file_path, batch in zip(missing_paths, parsed_batches):
+            self.__keep_parsed(file_path, batch)
+            batches[file_path] = batch
+        return [batches[file_path] for file_path in file_paths]
+
+    def __iter_files(self, file_paths):
+        """
+        Yields the readings of the given weather data files one file at a time, in the order of the paths.
+
+        Args:
+            file_paths (list): Paths to the weather data files.
+
+        Yields:
+            WeatherDataBatch or WeatherData: One batch per file in columnar mode, otherwise single readings.
+        """
+        if self.columnar and self.workers > 1:
+            yield from self.__parse_files_in_parallel(file_paths)
+            return
+        for file_path in file_paths:
+            if self.columnar:
+                yield self.parse_file(file_path)
+            else:
+                yield from self.parse_file(file_path)
+
+    def __archived(self, months):
+        """
+        Returns the readings of consecutive months sliced out of the archive, when the parser is columnar, has an
+        archive, and the files of every month are unchanged since it was written.
+
+        Args:
+            months (list): (year, month) tuples in month order.
+
+        Returns:
+            WeatherDataBatch: The readings of the months without a copy, or None.
+        """
+        if self.archive is None or not self.columnar:
+            return None
+        archived_months = []
+        for year, month in months:
+            month_files = {}
+            for file_path in self.index.files_for_month(year, month):
+                stat = os.stat(file_path)
+                month_files[os.path.basename(file_path)] = [stat.st_mtime_ns, stat.st_size]
+            archived_months.append(((year, month), month_files))
+        with profile_stage(self.profiler, "archive") as stage:
+            batch = self.archive.months_batch(archived_months)
+            if batch is not None:
+                stage["rows"] += len(batch)
+        return batch
+
+    def __months_of_year(self, year):
+        """
+        Returns the months of a year that have weather data files, in month order.
+
+        Args:
+            year (int): The year.
+
+        Returns:
+            list: (year, month) tuples.
+        """
+        return sorted(year_month for year_month in self.index.entries if year_month[0] == year)
 
     def parse_files_year_wise(self, year):
         """
@@ -88,15 +429,13 @@ class WeatherParser:
             year (int): Year for which weather data files should be parsed.
 
         Returns:
-            list: List of WeatherData objects containing parsed weather readings for the year.
+            list: List of WeatherData objects containing parsed weather readings for the year, or a WeatherDataBatch
+            when the parser is columnar.
         """
-        yearly_weather_readings = []
-        for filename in os.listdir(self.files_dir):
-            if filename.startswith(f'lahore_weather_{year}'):
-                file_path = os.path.join(self.files_dir, filename)
-                readings = self.parse_file(file_path)
-                yearly_weather_readings.extend(readings)
-        return yearly_weather_readings
+        batch = self.__archived(self.__months_of_year(year))
+        if batch is not None:
+            return batch
+        return self.__parse_files(self.index.files_for_year(year))
 
     def parse_files_month_wise(self, year, month):
         """
@@ -104,16 +443,77 @@ class WeatherParser:
 
         Args:
             year (int): Year for which weather data files should be parsed.
-            month (str): Month (in text format, e.g., 'Jan') for which weather data files should be parsed.
+            month (int): Month (1-12) for which weather data files should be parsed.
 
         Returns:
-            list: List of WeatherData objects containing parsed weather readings for the month.
-        """
-        monthly_weather_readings = []
-        month = MONTH_MAP[month]
-        for filename in os.listdir(self.files_dir):
-            if filename.startswith(f'lahore_weather_{year}_{month}'):
-                file_path = os.path.join(self.files_dir, filename)
-                readings = self.parse_file(file_path)
-                monthly_weather_readings.extend(readings)
-        return monthly_weather_readings
+            list: List of WeatherData objects containing parsed weather readings for the month, or a
+            WeatherDataBatch when the parser is columnar.
+        """
+        batch = self.__archived([(year, month)])
+        if batch is not None:
+            return batch
+        return self.__parse_files(self.index.files_for_month(year, month))
+
+    def iter_files_year_wise(self, year):
+        """
+        Yields the weather readings for a specific year one file at a time, so they can be aggregated without
+        holding the whole year in memory.
+
+        Args:
+            year (int): Year for which weather data files should be parsed.
+
+        Yields:
+            WeatherDataBatch or WeatherData: One batch per file in columnar mode, otherwise single readings. Months
+            served from the archive are yielded as one batch per month.
+        """
+        if self.archive is None or not self.columnar:
+            yield from self.__iter_files(self.index.files_for_year(year))
+            return
+        for _, month in self.__months_of_year(year):
+            yield from self.iter_files_month_wise(year, month)
+
+    def iter_files_month_wise(self, year, month):
+        """
+        Yields the weather readings for a specific month in a year one file at a time.
+
+        Args:
+            year (int): Year for which weather data files should be parsed.
+            month (int): Month (1-12) for which weather data files should be parsed.
+
+        Yields:
+            WeatherDataBatch or WeatherData: One batch per file in columnar mode, otherwise single readings. A month
+            served from the archive is yielded as a single batch.
+        """
+        batch = self.__archived([(year, month)])
+        if batch is not None:
+            yield batch
+            return
+        yield from self.__iter_files(self.index.files_for_month(year, month))
+
+    def iter_months(self, months):
+        """
+        Yields the weather readings of several months one month at a time, in the order given. In columnar mode with
+        more than one worker, the files of all the months not served from the archive are sent to the pool at once,
+        so a query or an archive build that handles its months one by one still parses them in parallel.
+
+        Args:
+            months (list): (year, month) tuples.
+
+        Yields:
+            tuple: The (year, month) tuple and the readings of the month, an iterable of WeatherDataBatch objects in
+            columnar mode, otherwise of WeatherData objects. The readings of a month are read lazily from its files
+            when the months are not parsed in parallel, so they must be consumed before the next month is taken.
+        """
+        if not self.columnar or self.workers <= 1:
+            for year, month in months:
+                yield (year, month), self.iter_files_month_wise(year, month)
+            return
+        archived = {year_month: self.__archived([year_month]) for year_month in months}
+        month_paths = {year_month: self.index.files_for_month(*year_month)
+                       for year_month, batch in archived.items() if batch is None}
+        batches = iter(self.__parse_files_in_parallel([path for paths in month_paths.values() for path in paths]))
+        for year_month in months:
+            if archived[year_month] is not None:
+                yield year_month, [archived[year_month]]
+            else:
+                yield year_month, [next(batches) for _ in month_paths[year_month]]
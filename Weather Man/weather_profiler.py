@@ -0,0 +1,124 @@
+"""
+weather_profiler.py
+
+This module defines the WeatherProfiler class, which records wall time, rows processed, files touched and peak memory
+for each stage of each command, so slow reports can be traced to the stage responsible.
+
+Classes:
+- WeatherProfiler: A class to time nested pipeline stages and summarize them per command.
+
+Functions:
+- profile_stage(profiler, name): Returns the stage context of a profiler, or a stand-in when there is no profiler.
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+def profile_stage(profiler, name):
+    """
+    Returns the stage context of a profiler, or a stand-in with the same record when profiling is off, so callers
+    do not have to check whether they are profiled.
+
+    Args:
+        profiler (WeatherProfiler): The profiler, or None.
+        name (str): Name of the stage.
+
+    Returns:
+        A context manager yielding the record of the stage.
+    """
+    if profiler is None:
+        return nullcontext({"rows": 0, "files": 0})
+    return profiler.stage(name)
+
+
+class WeatherProfiler:
+    """
+    A class to time nested pipeline stages and summarize them per command.
+
+    Stages may be nested, e.g. reading a CSV file while a calculation consumes a parser generator. The time of a
+    stage excludes the time of the stages nested in it, so the stage times of a command add up to its total time.
+    Peak memory is the highest traced Python memory seen while the stage or any stage nested in it was running.
+
+    Attributes:
+        command (str): The command the next stages are recorded for.
+        totals (dict): Dictionary mapping (command, stage) tuples to their calls, seconds, rows, files and peak
+                       memory in bytes.
+
+    Methods:
+        stage(name): Context manager timing one run of a stage.
+        summary_table(): Returns the totals as a text table.
+        to_json(): Returns the totals as a JSON string.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty WeatherProfiler and starts tracing memory allocations.
+        """
+        self.command = "setup"
+        self.totals = {}
+        self.__stack = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times one run of a stage. The yielded dictionary's "rows" and "files" counts may be increased by the caller.
+
+        Args:
+            name (str): Name of the stage.
+
+        Yields:
+            dict: The record of this run of the stage.
+        """
+        if self.__stack:
+            parent = self.__stack[-1]
+            parent["peak_memory"] = max(parent["peak_memory"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record = {"rows": 0, "files": 0, "peak_memory": 0, "nested_seconds": 0.0}
+        self.__stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            record["peak_memory"] = max(record["peak_memory"], tracemalloc.get_traced_memory()[1])
+            self.__stack.pop()
+            if self.__stack:
+                parent = self.__stack[-1]
+                parent["nested_seconds"] += seconds
+                parent["peak_memory"] = max(parent["peak_memory"], record["peak_memory"])
+
+            total = self.totals.setdefault((self.command, name),
+                                           {"calls": 0, "seconds": 0.0, "rows": 0, "files": 0, "peak_memory": 0})
+            total["calls"] += 1
+            total["seconds"] += seconds - record["nested_seconds"]
+            total["rows"] += record["rows"]
+            total["files"] += record["files"]
+            total["peak_memory"] = max(total["peak_memory"], record["peak_memory"])
+
+    def summary_table(self):
+        """
+        Returns the totals as a text table with one line per command and stage.
+
+        Returns:
+            str: The table.
+        """
+        lines = [f"{'command':<22} {'stage':<10} {'calls':>6} {'seconds':>9} {'rows':>8} {'files':>6} {'peak MiB':>9}"]
+        for (command, stage), total in self.totals.items():
+            lines.append(f"{command:<22} {stage:<10} {total['calls']:>6} {total['seconds']:>9.4f} "
+                         f"{total['rows']:>8} {total['files']:>6} {total['peak_memory'] / 2 ** 20:>9.2f}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        """
+        Returns the totals as a JSON string holding a list of records, one per command and stage.
+
+        Returns:
+            str: The JSON document.
+        """
+        records = [{"command": command, "stage": stage, **total} for (command, stage), total in self.totals.items()]
+        return json.dumps(records, indent=2)
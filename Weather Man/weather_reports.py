@@ -6,11 +6,32 @@ This module defines the WeatherReport class, which generates various reports bas
 Classes:
 - WeatherReport: A class to generate weather reports including extremes, averages, and daily temperatures.
 
+Functions:
+- colored_stars(color, count): Returns a run of stars in a color, built once per color and count.
 """
 
+import io
+from functools import lru_cache
+
 from constants import COLORS
 
 
+@lru_cache(maxsize=None)
+def colored_stars(color, count):
+    """
+    Returns a run of stars wrapped in a color's ANSI escape sequence. Temperatures only take a few dozen distinct
+    values, so each segment is built once and reused for every day of every chart.
+
+    Args:
+        color (str): Name of the color in COLORS.
+        count (int): Number of stars; no stars are drawn for zero or negative counts.
+
+    Returns:
+        String containing the colored stars.
+    """
+    return f"{COLORS[color]}{'*' * count}\033[0m"
+
+
 class WeatherReport:
     """
     A class to generate weather reports based on calculation results.
@@ -25,6 +46,7 @@ class WeatherReport:
         generate_average_weather_yearly_report(): Generates a report for average highest temperature, average lowest temperature,
                                   and average mean humidity.
         generate_daily_temperatures_report(year, month): Generates a daily temperatures report for a specific year and month.
+        write_daily_temperatures_report(stream, year, month): Writes the daily temperatures report to a stream.
     """
 
     def __init__(self, calculation_results):
@@ -47,15 +69,15 @@ class WeatherReport:
         Returns:
             String containing the colored stars.
         """
-        blue_color = COLORS["blue"]
-        red_color = COLORS["red"]
-        min_temp_stars = f"{blue_color}{'*' * int(min_temp)}\033[0m"
-        max_temp_stars = f"{red_color}{'*' * int(max_temp)}\033[0m"
+        min_temp_stars = colored_stars("blue", int(min_temp))
+        max_temp_stars = colored_stars("red", int(max_temp))
         return f"{day} {min_temp}C {min_temp_stars}{max_temp_stars} {max_temp}C"
 
-    def generate_extreme_weather_yearly_report(self):
+    def generate_extreme_weather_yearly_report(self, show_year=False):
         """
         Generates a report for highest temperature, lowest temperature, and humidity extremes.
+        Args:
+            show_year (bool): Add the year to each date, for reports covering more than one year.
         Returns:
             String containing the report.
         """
@@ -70,10 +92,11 @@ class WeatherReport:
             lowest_day = lowest_temperature.get("date")
             humidity = most_humid_day.get("humidity")
             humid_day = most_humid_day.get("date")
+            date_format = "%B %d %Y" if show_year else "%B %d"
             weather_report = (
-                f"Highest: {round(highest_temp, 1)}C on {highest_day.strftime("%B")} {highest_day.strftime("%d")}\n"
-                f"Lowest: {round(lowest_temp, 1)}C on {lowest_day.strftime("%B")} {lowest_day.strftime("%d")}\n"
-                f"Humidity: {round(humidity, 1)}% on {humid_day.strftime("%B")} {humid_day.strftime("%d")}"
+                f"Highest: {round(highest_temp, 1)}C on {highest_day.strftime(date_format)}\n"
+                f"Lowest: {round(lowest_temp, 1)}C on {lowest_day.strftime(date_format)}\n"
+                f"Humidity: {round(humidity, 1)}% on {humid_day.strftime(date_format)}"
             )
         else:
             weather_report = "No data available for extremes for given input."
@@ -107,15 +130,26 @@ class WeatherReport:
         Returns:
             String containing the report.
         """
-        weather_report = ""
+        weather_report = io.StringIO()
+        self.write_daily_temperatures_report(weather_report, year, month)
+        return weather_report.getvalue()
+
+    def write_daily_temperatures_report(self, stream, year, month):
+        """
+        Writes the daily temperatures report for a specific year and month to a stream. The lines of the month are
+        joined and written at once, so long charts are written in time linear in their size.
+        Args:
+            stream (file): Stream the report is written to.
+            year (int): Year for which the report is generated.
+            month (int): Month (1-12) for which the report is generated.
+        """
         if not self.results:
-            return "No data available for daily temperatures for given month."
-
-        for date in self.results:
-            day = date.strftime('%d')
-            daily_temps = self.results.get(date)
-            min_temp = daily_temps.get('min_temperature')
-            max_temp = daily_temps.get('max_temperature')
-            daily_temp_stars = self.__colored_stars(day, min_temp, max_temp)
-            weather_report += f"{daily_temp_stars}\n"
-        return weather_report
+            stream.write("No data available for daily temperatures for given month.")
+            return
+
+        lines = []
+        for date, daily_temps in self.results.items():
+            daily_temp_stars = self.__colored_stars(f"{date.day:02d}", daily_temps.get('min_temperature'),
+                                                    daily_temps.get('max_temperature'))
+            lines.append(f"{daily_temp_stars}\n")
+        stream.write("".join(lines))
@@ -0,0 +1,236 @@
+"""
+weather_server.py
+
+This module defines the WeatherServer class, a long-running query server that keeps the file index, the monthly
+summaries and the parsed files of one archive in memory, so dashboards can run many -e, -a and -c queries without
+starting a process and reading the files for each of them.
+
+Queries are plain HTTP GET requests whose parameters are the commands of weatherman.py without their dash, in
+order, e.g. GET /query?e=2005&a=2005/6&c=2005/6. The reports are returned as text/plain exactly as weatherman.py
+prints them. A format parameter of json or csv, e.g. GET /query?e=2005&format=json, returns the results as
+weatherman.py --format prints them instead, as application/x-ndjson or text/csv; invalid queries get a 400 response
+holding the error message.
+
+Classes:
+- WeatherServer: A class to answer weather queries over HTTP from a warm, hot-reloaded archive.
+
+"""
+
+import asyncio
+import io
+import os
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from constants import MESSAGES, SERVER_CONTENT_TYPES, SERVER_RELOAD_INTERVAL_SECONDS
+from output import OutputResults
+from weather_index import WeatherFileIndex
+
+TEXT_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+
+class WeatherServer:
+    """
+    A class to answer weather queries over HTTP from a warm archive.
+
+    Connections are handled concurrently by asyncio. Queries run in a worker thread so the event loop keeps accepting
+    clients, but one at a time, since the parser, its store and the summary table are not thread-safe. Every
+    reload_interval seconds the files directory is checked; when files were added, removed or modified, the index is
+    rebuilt, the changed files are dropped from the store and the affected monthly summaries are rebuilt.
+
+    Attributes:
+        summary_table (WeatherSummaryTable): The summary table of the archive, whose parser attribute reads the files.
+        reload_interval (float): Seconds between two checks of the files directory.
+        queries (int): Number of queries answered.
+        reloads (int): Number of times changed files were loaded.
+
+    Methods:
+        warm(): Builds every monthly summary and fills the store of parsed files.
+        answer(commands, output_format): Runs weatherman.py commands and returns their reports or results.
+        respond(request_line): Returns the status, Content-Type and body of the response to an HTTP request line.
+        reload(): Loads the files that changed since the last check.
+        serve(host, port, socket_path): Serves queries on a TCP port or a Unix socket until cancelled.
+    """
+
+    def __init__(self, summary_table, reload_interval=SERVER_RELOAD_INTERVAL_SECONDS):
+        """
+        Initializes WeatherServer with the summary table of the archive.
+
+        Args:
+            summary_table (WeatherSummaryTable): The summary table of the archive.
+            reload_interval (float): Seconds between two checks of the files directory.
+        """
+        self.summary_table = summary_table
+        self.reload_interval = reload_interval
+        self.queries = 0
+        self.reloads = 0
+        self.__lock = threading.Lock()
+        self.__snapshot = self.__snapshot_files()
+
+    def __snapshot_files(self):
+        """
+        Returns the mtime and size of every file in the files directory.
+
+        Returns:
+            dict: Dictionary mapping file paths to (mtime_ns, size) tuples.
+        """
+        snapshot = {}
+        with os.scandir(self.summary_table.parser.files_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def warm(self):
+        """
+        Builds every monthly summary and reads every file into the store of parsed files, up to its memory cap, so
+        the first queries are answered from memory.
+        """
+        with self.__lock:
+            self.summary_table.ingest()
+            self.summary_table.save()
+            parser = self.summary_table.parser
+            for year, month in sorted(parser.index.entries):
+                for _ in parser.iter_files_month_wise(year, month):
+                    pass
+
+    def answer(self, commands, output_format=None):
+        """
+        Runs weatherman.py commands against the warm archive.
+
+        Args:
+            commands (list): Command line arguments after the files directory, e.g. ['-e', '2005'].
+            output_format (str): One of the SERVER_CONTENT_TYPES formats to write the results in, or None for the
+                                 text reports.
+
+        Returns:
+            tuple: Whether the commands were valid, and their reports or results, or the error message.
+        """
+        if any(command.startswith('--') for command in commands):
+            return False, MESSAGES.get("invalid_command")
+        if output_format is not None:
+            if output_format not in SERVER_CONTENT_TYPES:
+                return False, MESSAGES.get("invalid_choice").format(choices=", ".join(SERVER_CONTENT_TYPES))
+            commands = commands + ["--format", output_format]
+        stream = io.StringIO()
+        with self.__lock:
+            results = OutputResults(["weatherman.py", self.summary_table.parser.files_dir] + commands,
+                                    summary_table=self.summary_table, stream=stream)
+            message = results.output()
+            self.queries += 1
+        if message:
+            return False, message
+        return True, stream.getvalue()
+
+    def respond(self, request_line):
+        """
+        Returns the response to an HTTP request line such as 'GET /query?e=2005 HTTP/1.1'.
+
+        Args:
+            request_line (str): The first line of the HTTP request.
+
+        Returns:
+            tuple: The HTTPStatus of the response, its Content-Type and its text body.
+        """
+        parts = request_line.split()
+        if len(parts) != 3:
+            return HTTPStatus.BAD_REQUEST, TEXT_CONTENT_TYPE, MESSAGES.get("invalid")
+        method, target, _ = parts
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, TEXT_CONTENT_TYPE, MESSAGES.get("invalid")
+        url = urlsplit(target)
+        if url.path != "/query":
+            return HTTPStatus.NOT_FOUND, TEXT_CONTENT_TYPE, MESSAGES.get("invalid")
+
+        commands = []
+        output_format = None
+        for command, date in parse_qsl(url.query, keep_blank_values=True):
+            if command == "format":
+                output_format = date
+            else:
+                commands += [f"-{command}", date]
+        is_valid, body = self.answer(commands, output_format)
+        if not is_valid:
+            return HTTPStatus.BAD_REQUEST, TEXT_CONTENT_TYPE, body
+        return HTTPStatus.OK, SERVER_CONTENT_TYPES.get(output_format, TEXT_CONTENT_TYPE), body
+
+    def reload(self):
+        """
+        Loads the files that were added, removed or modified since the last check. Unchanged months keep their
+        summaries and unchanged files stay in the store.
+
+        Returns:
+            bool: Whether any file changed.
+        """
+        snapshot = self.__snapshot_files()
+        if snapshot == self.__snapshot:
+            return False
+        changed_paths = [path for path in snapshot.keys() | self.__snapshot.keys()
+                         if snapshot.get(path) != self.__snapshot.get(path)]
+        with self.__lock:
+            parser = self.summary_table.parser
+            parser.index = WeatherFileIndex.build(parser.files_dir, parser.station)
+            if parser.store is not None:
+                for path in changed_paths:
+                    parser.store.discard(path)
+            self.summary_table.ingest()
+            self.summary_table.save()
+            self.__snapshot = snapshot
+            self.reloads += 1
+        return True
+
+    async def __handle(self, reader, writer):
+        """
+        Reads one HTTP request from a client, answers it and closes the connection.
+
+        Args:
+            reader (asyncio.StreamReader): Stream of the request.
+            writer (asyncio.StreamWriter): Stream of the response.
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            status, content_type, body = await asyncio.get_running_loop().run_in_executor(None, self.respond,
+                                                                                          request_line)
+            payload = body.encode()
+            writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                         f"Content-Type: {content_type}\r\n"
+                         f"Content-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    async def __watch(self):
+        """
+        Checks the files directory for changes every reload_interval seconds.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await loop.run_in_executor(None, self.reload)
+
+    async def serve(self, host, port, socket_path=None):
+        """
+        Serves queries until the task is cancelled.
+
+        Args:
+            host (str): Address to listen on when no socket path is given.
+            port (int): TCP port to listen on when no socket path is given.
+            socket_path (str): Path of a Unix socket to listen on instead of a TCP port.
+        """
+        if socket_path:
+            server = await asyncio.start_unix_server(self.__handle, path=socket_path)
+        else:
+            server = await asyncio.start_server(self.__handle, host, port)
+        watcher = asyncio.create_task(self.__watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
@@ -0,0 +1,92 @@
+"""
+weather_store.py
+
+This module defines the WeatherReadingStore class, an in-memory store of parsed weather data files that is shared
+by all commands of one invocation, so a file needed by several commands is only parsed once.
+
+Classes:
+- WeatherReadingStore: A least-recently-used store of parsed files with a memory cap.
+
+"""
+
+from collections import OrderedDict
+
+
+class WeatherReadingStore:
+    """
+    A least-recently-used store of parsed weather data files with a memory cap.
+
+    Stored batches are shared between callers and must not be modified.
+
+    Attributes:
+        memory_cap (int): Maximum number of bytes of readings kept in the store.
+        memory_used (int): Number of bytes of readings currently kept in the store.
+        hits (int): Number of lookups answered from the store.
+        misses (int): Number of lookups that found nothing.
+
+    Methods:
+        get(file_path): Returns the stored readings of a file, or None.
+        put(file_path, batch): Stores the readings of a file, evicting the least recently used files when the
+                               memory cap is exceeded.
+        discard(file_path): Removes the readings of a file from the store.
+    """
+
+    def __init__(self, memory_cap):
+        """
+        Initializes WeatherReadingStore with its memory cap.
+
+        Args:
+            memory_cap (int): Maximum number of bytes of readings kept in the store.
+        """
+        self.memory_cap = memory_cap
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.__batches = OrderedDict()
+
+    def get(self, file_path):
+        """
+        Returns the stored readings of a file and marks them as most recently used.
+
+        Args:
+            file_path (str): Path to the weather data file.
+
+        Returns:
+            WeatherDataBatch: The stored readings, or None when the file is not in the store.
+        """
+        batch = self.__batches.get(file_path)
+        if batch is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__batches.move_to_end(file_path)
+        return batch
+
+    def put(self, file_path, batch):
+        """
+        Stores the readings of a file. Readings larger than the memory cap are not stored.
+
+        Args:
+            file_path (str): Path to the weather data file.
+            batch (WeatherDataBatch): Parsed readings of the file.
+        """
+        if file_path in self.__batches:
+            self.memory_used -= self.__batches.pop(file_path).nbytes
+        if batch.nbytes > self.memory_cap:
+            return
+        self.__batches[file_path] = batch
+        self.memory_used += batch.nbytes
+        while self.memory_used > self.memory_cap:
+            _, evicted_batch = self.__batches.popitem(last=False)
+            self.memory_used -= evicted_batch.nbytes
+
+    def discard(self, file_path):
+        """
+        Removes the readings of a file from the store, e.g. because the file changed on disk.
+
+        Args:
+            file_path (str): Path to the weather data file.
+        """
+        batch = self.__batches.pop(file_path, None)
+        if batch is not None:
+            self.memory_used -= batch.nbytes
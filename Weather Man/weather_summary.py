@@ -0,0 +1,201 @@
+"""
+weather_summary.py
+
+This module defines the WeatherSummaryTable class, which holds one small summary per month so that queries over many
+years combine monthly summaries instead of scanning every daily reading again.
+
+Classes:
+- WeatherSummaryTable: A class to build, combine and persist per-month summaries of weather readings.
+
+"""
+
+import json
+import os
+
+from weather_aggregator import WeatherAggregator
+from weather_index import station_key
+
+
+class WeatherSummaryTable:
+    """
+    A class to build, combine and persist per-month summaries of weather readings.
+
+    Each summary is a WeatherAggregator holding the count, the sums and the extremes with their dates for one month.
+    Alongside every summary the table keeps a manifest of the month's source files with their mtime and size. A
+    summary is only reused while its month still has exactly those files, unchanged; otherwise it is rebuilt from
+    the files the next time it is needed.
+
+    Attributes:
+        parser (WeatherParser): Parser used to read the files of a month.
+        path (str): Path of the JSON file the table is saved to, or None for a table that is not persisted.
+        summaries (dict): Dictionary mapping (year, month) tuples to their WeatherAggregator summaries.
+        manifest (dict): Dictionary mapping (year, month) tuples to {file name: [mtime_ns, size]} dictionaries.
+        rebuilt_months (int): Number of month summaries built from the files since the table was created.
+        parsed_files (int): Number of files read to build those summaries.
+
+    Methods:
+        load(parser, table_dir): Returns the table saved in table_dir for the parser's directory.
+        save(): Writes the table to its path when it changed.
+        summary(year, month): Returns the up-to-date summary of a month, rebuilding it when needed.
+        iter_summaries(months): Yields the summaries of the given months in order, rebuilding the stale ones together.
+        ingest(): Brings every month of the directory up to date, reading only new or changed files.
+    """
+
+    def __init__(self, parser, path=None):
+        """
+        Initializes an empty WeatherSummaryTable.
+
+        Args:
+            parser (WeatherParser): Parser used to read the files of a month.
+            path (str): Path of the JSON file the table is saved to.
+        """
+        self.parser = parser
+        self.path = path
+        self.summaries = {}
+        self.manifest = {}
+        self.rebuilt_months = 0
+        self.parsed_files = 0
+        self.__changed = False
+
+    @classmethod
+    def load(cls, parser, table_dir):
+        """
+        Returns the table saved in table_dir for the parser's directory and station, or an empty table that will be
+        saved there.
+
+        Args:
+            parser (WeatherParser): Parser used to read the files of a month.
+            table_dir (str): Directory path where summary tables are saved.
+
+        Returns:
+            WeatherSummaryTable: The table of the directory.
+        """
+        table = cls(parser, os.path.join(table_dir, f"{station_key(parser.files_dir, parser.station)}.summary.json"))
+        try:
+            with open(table.path) as table_file:
+                saved_table = json.load(table_file)
+            for month_entry in saved_table.get("months"):
+                year_month = (month_entry["year"], month_entry["month"])
+                table.summaries[year_month] = WeatherAggregator.from_dict(month_entry["summary"])
+                table.manifest[year_month] = month_entry["files"]
+        except (OSError, ValueError, TypeError, KeyError):
+            table.summaries = {}
+            table.manifest = {}
+        return table
+
+    def save(self):
+        """
+        Writes the table to its path when a summary was rebuilt or removed. Failures are ignored, since the saved
+        table is only an optimization.
+        """
+        if self.path is None or not self.__changed:
+            return
+        months = [{"year": year, "month": month, "files": self.manifest[(year, month)],
+                   "summary": summary.to_dict()} for (year, month), summary in sorted(self.summaries.items())]
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temporary_path, "w") as table_file:
+                json.dump({"months": months}, table_file)
+            os.replace(temporary_path, self.path)
+            self.__changed = False
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def __month_files(self, year, month):
+        """
+        Returns the current mtime and size of every file of a month.
+
+        Args:
+            year (int): Year of the month.
+            month (int): Month (1-12).
+
+        Returns:
+            dict: Dictionary mapping file names to [mtime_ns, size] lists.
+        """
+        month_files = {}
+        for file_path in self.parser.index.files_for_month(year, month):
+            stat = os.stat(file_path)
+            month_files[os.path.basename(file_path)] = [stat.st_mtime_ns, stat.st_size]
+        return month_files
+
+    def summary(self, year, month):
+        """
+        Returns the summary of a month. It is built from the month's files when there is none yet, or when files
+        of the month were added, removed or modified since it was built.
+
+        Args:
+            year (int): Year of the month.
+            month (int): Month (1-12).
+
+        Returns:
+            WeatherAggregator: The summary of the month.
+        """
+        return next(self.iter_summaries([(year, month)]))
+
+    def __stale_months(self, months):
+        """
+        Returns the months whose summary is missing or whose files were added, removed or modified since it was
+        built.
+
+        Args:
+            months (iterable): (year, month) tuples.
+
+        Returns:
+            dict: Dictionary mapping the stale (year, month) tuples, in the order given, to their current files.
+        """
+        stale_months = {}
+        for year_month in months:
+            month_files = self.__month_files(*year_month)
+            if year_month not in self.summaries or self.manifest.get(year_month) != month_files:
+                stale_months[year_month] = month_files
+        return stale_months
+
+    def iter_summaries(self, months):
+        """
+        Yields the summaries of the given months in order, ready to be passed to WeatherCalculator. The stale
+        months are rebuilt first, from a single iter_months call of the parser, so their files are parsed in
+        parallel when the parser has several workers.
+
+        Args:
+            months (iterable): (year, month) tuples.
+
+        Yields:
+            WeatherAggregator: The summary of each month.
+        """
+        months = list(months)
+        stale_months = self.__stale_months(months)
+        for year_month, month_readings in self.parser.iter_months(list(stale_months)):
+            self.summaries[year_month] = WeatherAggregator().merge(WeatherAggregator().consume(month_readings))
+            self.manifest[year_month] = stale_months[year_month]
+            self.rebuilt_months += 1
+            self.parsed_files += len(stale_months[year_month])
+            self.__changed = True
+        for year_month in months:
+            yield self.summaries[year_month]
+
+    def ingest(self):
+        """
+        Brings every month of the directory up to date. Only months with new, removed or modified files are read
+        again, and months whose files are all gone are dropped, so the work done is proportional to what changed.
+
+        Returns:
+            dict: Dictionary with the number of rebuilt months, parsed files and dropped months.
+        """
+        rebuilt_months, parsed_files = self.rebuilt_months, self.parsed_files
+        indexed_months = set(self.parser.index.entries)
+        for _ in self.iter_summaries(sorted(indexed_months)):
+            pass
+
+        dropped_months = [year_month for year_month in self.summaries if year_month not in indexed_months]
+        for year_month in dropped_months:
+            del self.summaries[year_month]
+            del self.manifest[year_month]
+            self.__changed = True
+
+        return {
+            "rebuilt_months": self.rebuilt_months - rebuilt_months,
+            "parsed_files": self.parsed_files - parsed_files,
+            "dropped_months": len(dropped_months),
+        }
@@ -0,0 +1,248 @@
+"""
+weather_validation.py
+
+This module defines the WeatherValidator class, which turns the raw text columns of a weather data file into a
+WeatherDataBatch. Bad values are coerced to NaN or NaT a whole column at a time instead of raising an exception per
+row, and every rejected row is counted, classified and optionally written to a quarantine file.
+
+Classes:
+- WeatherValidator: A class to validate the raw columns of weather data files and account for the rejected rows.
+
+"""
+
+import csv
+import io
+import os
+import re
+import sys
+
+import numpy as np
+
+from constants import MEASUREMENT_COLUMNS, MESSAGES
+from weather_data import WeatherDataBatch
+
+QUARANTINE_COLUMNS = ("file", "row", "reasons", "date", *MEASUREMENT_COLUMNS)
+
+DATE_PADDING = re.compile(r"-(\d)(?=-|$)", re.MULTILINE)
+
+ISO_DATE = re.compile(r"\d{4}-\d\d-\d\d")
+
+ISO_DATES = re.compile(r"(?:\d{4}-\d\d-\d\d|NaT)(?:\n(?:\d{4}-\d\d-\d\d|NaT))*")
+
+
+class WeatherValidator:
+    """
+    A class to validate the raw columns of weather data files and account for the rejected rows.
+
+    A value is missing when it is empty and malformed when it is not a finite number, or not a YYYY-MM-DD date for
+    the date column. A row is rejected when any of its seven values is missing or malformed. The six measurement
+    columns are converted by a single NumPy cast and the date column by one regular expression pass and one cast;
+    only the columns that fail their cast are converted again, value by value, so a single bad value costs a pass
+    over its own column and pandas is never imported.
+
+    The validator holds no open files, so it can be handed to worker processes. Each process prints the summary
+    lines of the files it parsed and appends their rejected rows to the quarantine file, one file per write. The
+    counts of a file parsed in a worker are recorded in the worker's copy of the validator and have to be passed back
+    to record_file of the parent's.
+
+    Attributes:
+        quarantine_path (str): Optional CSV file the rejected rows are appended to.
+        report (bool): Whether a summary line is printed to standard error for every file with rejected rows.
+        files (dict): Dictionary mapping file paths to their 'rows', 'rejected' and 'rejects' counts, where
+                      'rejects' maps column names to their 'missing' and 'malformed' counts.
+
+    Methods:
+        start_file(file_path): Resets the counts of a file before it is parsed.
+        validate(file_path, date_col, raw_columns, first_row): Converts raw columns into a batch of valid readings.
+        finish_file(file_path): Prints the summary line of a file once all of its rows were validated.
+        record_file(file_path, counts): Records the counts of a file validated by another copy of the validator.
+        summary_line(file_path): Returns the summary line of a file.
+    """
+
+    def __init__(self, quarantine_path=None, report=True):
+        """
+        Initializes WeatherValidator and writes the header of a new or empty quarantine file.
+
+        Args:
+            quarantine_path (str): Optional CSV file the rejected rows are appended to.
+            report (bool): Whether a summary line is printed to standard error for every file with rejected rows.
+        """
+        self.quarantine_path = quarantine_path
+        self.report = report
+        self.files = {}
+        if quarantine_path and (not os.path.exists(quarantine_path) or not os.path.getsize(quarantine_path)):
+            with open(quarantine_path, "w", newline="") as quarantine_file:
+                csv.writer(quarantine_file, lineterminator="\n").writerow(QUARANTINE_COLUMNS)
+
+    @staticmethod
+    def __coerce_dates(values, missing):
+        """
+        Converts YYYY-M-D strings into dates. The column is joined into one string whose months and days are
+        zero-padded by a single regular expression substitution, so NumPy can cast the whole column at once. When
+        the column holds a value that is not such a date, each value is padded and matched on its own and those that
+        do not match are set to NaT, and when the cast fails on a date that does not exist, e.g. 2005-2-30, the
+        dates are cast one at a time.
+
+        Args:
+            values (numpy.ndarray): Object array of the str values of the date column.
+            missing (numpy.ndarray): Boolean mask of the empty values.
+
+        Returns:
+            numpy.ndarray: The datetime64[D] dates, NaT where missing or malformed.
+        """
+        values = np.where(missing, "NaT", values).tolist()
+        text = DATE_PADDING.sub(r"-0\1", "\n".join(values))
+        if ISO_DATES.fullmatch(text):
+            dates = text.split("\n")
+        else:
+            dates = [date if ISO_DATE.fullmatch(date) else "NaT"
+                     for date in (DATE_PADDING.sub(r"-0\1", value) for value in values)]
+        try:
+            return np.array(dates, dtype="datetime64[D]")
+        except ValueError:
+            coerced = np.full(len(dates), np.datetime64("NaT"), dtype="datetime64[D]")
+            for position, date in enumerate(dates):
+                try:
+                    coerced[position] = np.datetime64(date, "D")
+                except ValueError:
+                    pass
+            return coerced
+
+    @staticmethod
+    def __coerce_floats(values, missing):
+        """
+        Converts number strings into floats, all measurement columns in one cast. When that cast fails, each column
+        is cast on its own, and only the values of a column that fails its cast are converted one at a time.
+
+        Args:
+            values (numpy.ndarray): Object array of the str values of the measurement columns, one row per column.
+            missing (numpy.ndarray): Boolean mask of the empty values.
+
+        Returns:
+            numpy.ndarray: The float64 values, NaN where missing or malformed.
+        """
+        values = np.where(missing, "nan", values)
+        try:
+            return values.astype(np.float64)
+        except ValueError:
+            pass
+        floats = np.full(values.shape, np.nan)
+        for row, column in enumerate(values):
+            try:
+                floats[row] = column.astype(np.float64)
+            except ValueError:
+                for position, value in enumerate(column.tolist()):
+                    try:
+                        floats[row, position] = float(value)
+                    except ValueError:
+                        pass
+        return floats
+
+    def start_file(self, file_path):
+        """
+        Resets the counts of a file before it is parsed, so a file parsed again is not counted twice.
+
+        Args:
+            file_path (str): Path to the weather data file.
+        """
+        self.files[file_path] = {"rows": 0, "rejected": 0, "rejects": {}}
+
+    def validate(self, file_path, date_col, raw_columns, first_row=1):
+        """
+        Converts the raw columns of some rows of a file into a batch of their valid readings, and counts and
+        quarantines the rejected rows.
+
+        Args:
+            file_path (str): Path to the weather data file.
+            date_col (str): Name of the date column in the file.
+            raw_columns (list): The str values of the date column followed by those of the six measurement columns,
+                                as sequences of equal length; missing values are empty strings.
+            first_row (int): Number of the first of these rows among the data rows of the file, counted from 1.
+
+        Returns:
+            WeatherDataBatch: The valid readings of the rows.
+        """
+        counts = self.files.setdefault(file_path, {"rows": 0, "rejected": 0, "rejects": {}})
+        raw_columns = np.array(raw_columns, dtype=object).reshape(len(MEASUREMENT_COLUMNS) + 1, -1)
+        missing = raw_columns == ""
+        dates = self.__coerce_dates(raw_columns[0], missing[0])
+        columns = self.__coerce_floats(raw_columns[1:], missing[1:])
+        malformed = np.vstack((np.isnat(dates), ~np.isfinite(columns))) & ~missing
+
+        rejects = missing | malformed
+        rejected = rejects.any(axis=0)
+        counts["rows"] += len(dates)
+        counts["rejected"] += int(np.count_nonzero(rejected))
+        if rejected.any():
+            for name, missing_count, malformed_count in zip((date_col, *MEASUREMENT_COLUMNS),
+                                                            np.count_nonzero(missing, axis=1).tolist(),
+                                                            np.count_nonzero(malformed, axis=1).tolist()):
+                column_counts = counts["rejects"].setdefault(name, {"missing": 0, "malformed": 0})
+                column_counts["missing"] += missing_count
+                column_counts["malformed"] += malformed_count
+
+        if self.quarantine_path and rejected.any():
+            self.__quarantine(file_path, (date_col, *MEASUREMENT_COLUMNS), raw_columns, missing, rejects, first_row)
+        valid = ~rejected
+        return WeatherDataBatch(dates[valid], *(column[valid] for column in columns))
+
+    def __quarantine(self, file_path, names, raw_columns, missing, rejects, first_row):
+        """
+        Appends the rejected rows to the quarantine file with their row number and the reasons they were rejected.
+
+        Args:
+            file_path (str): Path to the weather data file.
+            names (tuple): Names of the date column and the measurement columns.
+            raw_columns (numpy.ndarray): The str values of the rows, one row of the array per column.
+            missing (numpy.ndarray): Boolean mask of the missing values, shaped like raw_columns.
+            rejects (numpy.ndarray): Boolean mask of the missing or malformed values, shaped like raw_columns.
+            first_row (int): Number of the first of the rows among the data rows of the file.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for position in np.flatnonzero(rejects.any(axis=0)).tolist():
+            reasons = "; ".join(f"{name}: {'missing' if missing[column, position] else 'malformed'}"
+                                for column, name in enumerate(names) if rejects[column, position])
+            writer.writerow([file_path, first_row + position, reasons, *raw_columns[:, position].tolist()])
+        with open(self.quarantine_path, "a", newline="") as quarantine_file:
+            quarantine_file.write(buffer.getvalue())
+
+    def summary_line(self, file_path):
+        """
+        Returns the summary line of a file, e.g. 'f.txt: rejected 2 of 31 rows (Max TemperatureC: 1 missing)'.
+
+        Args:
+            file_path (str): Path to the weather data file.
+
+        Returns:
+            str: The summary line.
+        """
+        counts = self.files.get(file_path, {"rows": 0, "rejected": 0, "rejects": {}})
+        details = []
+        for name, column_counts in counts["rejects"].items():
+            kinds = [f"{count} {kind}" for kind, count in column_counts.items() if count]
+            if kinds:
+                details.append(f"{name}: {', '.join(kinds)}")
+        return MESSAGES.get("rejected_rows").format(file=os.path.basename(file_path), rejected=counts["rejected"],
+                                                    rows=counts["rows"], details="; ".join(details) or "none")
+
+    def finish_file(self, file_path):
+        """
+        Prints the summary line of a file to standard error when any of its rows was rejected.
+
+        Args:
+            file_path (str): Path to the weather data file.
+        """
+        if self.report and self.files.get(file_path, {}).get("rejected"):
+            print(self.summary_line(file_path), file=sys.stderr)
+
+    def record_file(self, file_path, counts):
+        """
+        Records the counts of a file validated by another copy of the validator, e.g. in a worker process, without
+        printing its summary line again.
+
+        Args:
+            file_path (str): Path to the weather data file.
+            counts (dict): The 'rows', 'rejected' and 'rejects' counts of the file, as kept in files.
+        """
+        self.files[file_path] = counts
@@ -1,9 +1,33 @@
-"""file: main/constants.py
-    This module is for holding the constants
-    - TIME_ZONES_CHOICES: contains list of tuples of time zones
-"""
-
-TIME_ZONES_CHOICES = [
-        ('EST', 'Eastern Standard Time'),
-        ('PKST', 'Pakistan Standard Time'),
-    ]
+"""file: main/constants.py
+    This module is for holding the constants
+    - TIME_ZONES_CHOICES: contains list of tuples of time zones
+    - TIME_ZONE_NAMES: maps each time zone choice to its IANA time zone name
+    - FLIPPED_TIME_ZONES: maps each time zone choice to the one the cron job converts it to
+    - CRON_THRESHOLD_MINUTES: minutes an entry must be left unchanged before the cron job converts it
+    - BULK_UPDATE_BATCH_SIZE: number of entries converted per batch on databases without AT TIME ZONE
+    - CRON_CHUNK_SIZE: number of entries the cron job converts per transaction
+    - CHANGE_TIME_ZONE_CHECKPOINT: name of the checkpoint recording the progress of the cron job
+"""
+
+TIME_ZONES_CHOICES = [
+        ('EST', 'Eastern Standard Time'),
+        ('PKST', 'Pakistan Standard Time'),
+    ]
+
+TIME_ZONE_NAMES = {
+    'EST': 'America/New_York',
+    'PKST': 'Asia/Karachi',
+}
+
+FLIPPED_TIME_ZONES = {
+    'EST': 'PKST',
+    'PKST': 'EST',
+}
+
+CRON_THRESHOLD_MINUTES = 10
+
+BULK_UPDATE_BATCH_SIZE = 5000
+
+CRON_CHUNK_SIZE = 10000
+
+CHANGE_TIME_ZONE_CHECKPOINT = 'change_time_zone'
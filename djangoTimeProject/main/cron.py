@@ -1,51 +1,214 @@
-"""file: main/cron.py
-    This module is for setting up cron job
-        Function: change_time_zone()
-        - Changes the time zone for all entries in the TimeModel database.
-"""
-import logging
-from datetime import timedelta
-import pytz
-from django.utils import timezone
-
-from main.models import TimeModel
-
-logger = logging.getLogger('main')
-
-def change_time_zone():
-    """Changes the time_obj zone for all entries in the TimeModel database.
-    Logging is used to record the start and end of the function, as well as any errors that occur
-    during execution.
-    Raises:
-        - Exception: If any error occurs during the execution, it will be logged.
-    :return:
-    :rtype:
-    """
-
-    pkst = pytz.timezone('Asia/Karachi')
-    est = pytz.timezone('America/New_York')
-
-    threshold_time = timezone.now() - timedelta(minutes=10)
-    try:
-        time_data = TimeModel.objects.filter(updated_at__lte=threshold_time)
-        for time_obj in time_data:
-
-            current_time = time_obj.time
-
-            if time_obj.time_zone == "PKST":
-                localized_time = pkst.localize(current_time)
-                new_time = localized_time.astimezone(est)
-                time_obj.time_zone = "EST"
-                time_obj.time = new_time.replace(tzinfo=None)
-            else:
-                localized_time = est.localize(current_time)
-                new_time = localized_time.astimezone(pkst)
-                time_obj.time_zone = "PKST"
-                time_obj.time = new_time.replace(tzinfo=None)
-
-            time_obj.save()
-
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-
-    logger.info("change_time_zone function ended.")
+"""file: main/cron.py
+    This module is for setting up cron job
+        Function: change_time_zone()
+        - Changes the time zone for all entries in the TimeModel database, one chunk at a time.
+        Function: flip_pass(chunk_size)
+        - Runs or resumes the checkpointed pass of the cron job.
+        Function: flip_chunks(threshold_time, last_id, chunk_size, checkpoint, stop_id)
+        - Flips the entries of a pass in primary key chunks, one transaction per chunk.
+        Function: flip_queryset(queryset)
+        - Flips the entries of a queryset with the fastest method of the database.
+        Function: flip_time_zones(queryset)
+        - Flips PKST and EST entries with a single set-based UPDATE on PostgreSQL.
+        Function: flip_time_zones_in_batches(queryset, batch_size)
+        - Flips entries in fixed-size batches of grouped UPDATEs on other databases.
+        Function: convert_time(time, time_zone)
+        - Converts a single naive time to the other time zone in Python.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+import pytz
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from main.constants import (BULK_UPDATE_BATCH_SIZE, CHANGE_TIME_ZONE_CHECKPOINT, CRON_CHUNK_SIZE,
+                            CRON_THRESHOLD_MINUTES, FLIPPED_TIME_ZONES, TIME_ZONE_NAMES)
+from main.db_functions import ConvertTimeZone
+from main.locks import advisory_lock
+from main.models import CronCheckpoint, TimeModel
+
+logger = logging.getLogger('main')
+
+
+def convert_time(time, time_zone):
+    """
+    A function to convert a naive time from its time zone to the other one
+    args:
+    - time: The naive time, local to time_zone
+    - time_zone: The time zone choice of the time, 'PKST' or 'EST'
+    return:
+    - a tuple of the converted naive time and its time zone choice
+    """
+    new_time_zone = FLIPPED_TIME_ZONES.get(time_zone, 'PKST')
+    source_zone = pytz.timezone(TIME_ZONE_NAMES['PKST' if time_zone == 'PKST' else 'EST'])
+    localized_time = source_zone.localize(time)
+    new_time = localized_time.astimezone(pytz.timezone(TIME_ZONE_NAMES[new_time_zone]))
+    return new_time.replace(tzinfo=None), new_time_zone
+
+
+def flip_time_zones(queryset):
+    """
+    A function to flip every entry of a queryset with one UPDATE statement.
+    PKST times are converted to EST and all others to PKST by AT TIME ZONE expressions, so no row
+    is loaded into Python. Both zones are flipped by the same statement, so no row is flipped twice.
+    args:
+    - queryset: The TimeModel entries to flip
+    return:
+    - the number of entries flipped
+    """
+    is_pkst = When(time_zone='PKST', then=ConvertTimeZone(F('time'), TIME_ZONE_NAMES['PKST'],
+                                                          TIME_ZONE_NAMES['EST']))
+    return queryset.update(
+        time=Case(is_pkst, default=ConvertTimeZone(F('time'), TIME_ZONE_NAMES['EST'], TIME_ZONE_NAMES['PKST'])),
+        time_zone=Case(When(time_zone='PKST', then=Value('EST')), default=Value('PKST')),
+        updated_at=timezone.now(),
+    )
+
+
+def flip_time_zones_in_batches(queryset, batch_size=BULK_UPDATE_BATCH_SIZE):
+    """
+    A function to flip every entry of a queryset in batches, for databases without AT TIME ZONE.
+    Entries are read in primary key order, batch_size at a time, as plain (id, time, time_zone)
+    tuples. Converting a time only ever shifts it by a few whole offsets, so each batch is written
+    back by one UPDATE ... SET time = time + shift per distinct shift, instead of one save() per entry.
+    The UPDATEs keep the filter of the queryset, so an entry changed by someone else since it was read
+    is left alone.
+    args:
+    - queryset: The TimeModel entries to flip
+    - batch_size: The number of entries read and written at a time
+    return:
+    - the number of entries flipped
+    """
+    flipped = 0
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', 'time', 'time_zone')[
+                     :batch_size])
+        if not batch:
+            return flipped
+        shifted_ids = defaultdict(list)
+        for time_id, time, time_zone in batch:
+            new_time, new_time_zone = convert_time(time, time_zone)
+            shifted_ids[(new_time - time, new_time_zone)].append(time_id)
+        now = timezone.now()
+        for (shift, new_time_zone), ids in shifted_ids.items():
+            flipped += queryset.filter(id__in=ids).update(time=F('time') + shift, time_zone=new_time_zone,
+                                                          updated_at=now)
+        last_id = batch[-1][0]
+
+
+def flip_queryset(queryset):
+    """
+    A function to flip every entry of a queryset, with one UPDATE statement on PostgreSQL and in
+    batches of BULK_UPDATE_BATCH_SIZE entries elsewhere
+    args:
+    - queryset: The TimeModel entries to flip
+    return:
+    - the number of entries flipped
+    """
+    if connection.vendor == 'postgresql':
+        return flip_time_zones(queryset)
+    return flip_time_zones_in_batches(queryset)
+
+
+def flip_chunks(threshold_time, last_id=0, chunk_size=CRON_CHUNK_SIZE, checkpoint=None, stop_id=None):
+    """
+    A function to flip every entry updated at or before threshold_time with an id above last_id,
+    and up to stop_id when it is given.
+    The entries are taken in chunks of chunk_size ids found by keyset pagination on the primary key,
+    so no queryset result is held in memory. Each chunk is flipped in its own transaction, together
+    with the update of the checkpoint, so a chunk and its checkpoint are committed or lost together.
+    Where the database supports it, the ids of a chunk are selected FOR UPDATE SKIP LOCKED, so entries
+    being flipped by another process are left to it and several processes can flip the table at once
+    without flipping an entry twice.
+    A failing chunk is logged and skipped, and the checkpoint is no longer advanced, so the next run
+    resumes at that chunk; the entries flipped after it have a new updated_at and are not flipped again.
+    args:
+    - threshold_time: Entries updated at or before this time are flipped
+    - last_id: Entries with this id or a lower one are skipped
+    - chunk_size: The number of entries flipped per transaction
+    - checkpoint: The CronCheckpoint recording the progress, or None
+    - stop_id: Entries with an id above this one are skipped, or None to go to the end of the table
+    return:
+    - a tuple of the number of entries flipped and the number of chunks that failed
+    """
+    pending = TimeModel.objects.filter(updated_at__lte=threshold_time)
+    if stop_id is not None:
+        pending = pending.filter(id__lte=stop_id)
+    flipped = 0
+    failed_chunks = 0
+    while True:
+        chunk_ids = None
+        try:
+            with transaction.atomic():
+                chunk = pending.filter(id__gt=last_id).order_by('id')
+                if connection.features.has_select_for_update_skip_locked:
+                    chunk = chunk.select_for_update(skip_locked=True)
+                chunk_ids = list(chunk.values_list('id', flat=True)[:chunk_size])
+                if not chunk_ids:
+                    return flipped, failed_chunks
+                flipped += flip_queryset(pending.filter(id__in=chunk_ids))
+                if checkpoint is not None and not failed_chunks:
+                    checkpoint.last_id = chunk_ids[-1]
+                    checkpoint.save(update_fields=['last_id', 'updated_at'])
+        except DatabaseError as e:
+            failed_chunks += 1
+            if not chunk_ids:
+                logger.error(f"Error occurred while selecting the ids after {last_id}: {e}")
+                return flipped, failed_chunks
+            logger.error(f"Error occurred while flipping ids {chunk_ids[0]} to {chunk_ids[-1]}: {e}")
+        last_id = chunk_ids[-1]
+
+
+def flip_pass(chunk_size=CRON_CHUNK_SIZE):
+    """
+    A function to run or resume the pass recorded by the CronCheckpoint named
+    CHANGE_TIME_ZONE_CHECKPOINT, and to clear the checkpoint once every chunk of the pass succeeded
+    args:
+    - chunk_size: The number of entries flipped per transaction
+    """
+    checkpoint, _ = CronCheckpoint.objects.get_or_create(name=CHANGE_TIME_ZONE_CHECKPOINT)
+    if checkpoint.threshold_time is None:
+        checkpoint.threshold_time = timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES)
+        checkpoint.last_id = 0
+        checkpoint.save()
+    else:
+        logger.info(f"Resuming the pass of {checkpoint.threshold_time} after id {checkpoint.last_id}.")
+
+    flipped, failed_chunks = flip_chunks(checkpoint.threshold_time, checkpoint.last_id, chunk_size, checkpoint)
+    if not failed_chunks:
+        checkpoint.threshold_time = None
+        checkpoint.last_id = 0
+        checkpoint.save()
+    logger.info(f"Flipped the time zone of {flipped} entries, {failed_chunks} chunks failed.")
+
+
+def change_time_zone(chunk_size=CRON_CHUNK_SIZE):
+    """Changes the time_obj zone for all entries in the TimeModel database.
+    Only one run at a time holds the advisory lock named CHANGE_TIME_ZONE_CHECKPOINT; a run started
+    by cron while the previous one is still flipping skips this minute instead of competing with it.
+    The entries are flipped chunk_size at a time, one transaction per chunk, and the progress is
+    recorded in the CronCheckpoint named CHANGE_TIME_ZONE_CHECKPOINT. A run that finds a pass left
+    unfinished by an earlier run resumes it, with its threshold time, after its last committed chunk;
+    otherwise it starts a new pass over the entries left unchanged for CRON_THRESHOLD_MINUTES.
+    Logging is used to record the start and end of the function, as well as any errors that occur
+    during execution.
+    Raises:
+        - Exception: If any error occurs during the execution, it will be logged.
+    :return:
+    :rtype:
+    """
+
+    try:
+        with advisory_lock(CHANGE_TIME_ZONE_CHECKPOINT) as acquired:
+            if acquired:
+                flip_pass(chunk_size)
+            else:
+                logger.info("Skipped: an earlier change_time_zone run is still in progress.")
+
+    except Exception as e:
+        logger.error(f"Error occurred: {e}")
+
+    logger.info("change_time_zone function ended.")
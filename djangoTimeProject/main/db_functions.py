@@ -0,0 +1,47 @@
+"""file: main/db_functions.py
+    This module is for database functions used in queryset expressions
+    class: ConvertTimeZone
+        - responsible for converting a naive timestamp between time zones on the database side
+"""
+
+from django.db.models import DateTimeField, Func, Value
+
+
+class ConvertTimeZone(Func):
+    """A class to convert a naive timestamp from the wall clock of one time zone to that of another,
+    with PostgreSQL's AT TIME ZONE operator, so a whole table can be converted by one UPDATE.
+
+    Django stores a DateTimeField as timestamp with time zone on PostgreSQL, and a naive value is
+    written and read as local time of the connection's time zone, settings.TIME_ZONE when USE_TZ is
+    False. The SQL is therefore (time AT TIME ZONE connection_zone AT TIME ZONE from_zone AT TIME ZONE
+    to_zone): the first operator turns the stored instant back into the naive value Django wrote, the
+    second reads it as local time in from_zone, and the third turns that instant into local time in
+    to_zone, which Django reads back unchanged.
+    """
+    arg_joiner = ' AT TIME ZONE '
+    template = '(%(expressions)s)'
+    output_field = DateTimeField()
+
+    def __init__(self, expression, from_zone, to_zone, **extra):
+        """
+        A function to initialize the conversion of an expression between two IANA time zones
+        args:
+        - expression: The field name or expression holding the naive timestamp
+        - from_zone: The IANA name of the time zone the timestamp is local to
+        - to_zone: The IANA name of the time zone to convert the timestamp to
+        """
+        super().__init__(expression, Value(from_zone), Value(to_zone), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        """
+        A function to compile the conversion, reading the stored timestamp in the time zone of the connection
+        args:
+        - compiler: The SQL compiler of the query
+        - connection: The database connection the query runs on
+        return:
+        - a tuple of the SQL and its parameters
+        """
+        expression, from_zone, to_zone = self.get_source_expressions()
+        conversion = self.copy()
+        conversion.set_source_expressions([expression, Value(connection.timezone_name), from_zone, to_zone])
+        return super(ConvertTimeZone, conversion).as_sql(compiler, connection, **extra_context)
@@ -0,0 +1,36 @@
+"""file: main/locks.py
+    This module is for locks shared by every process using the database
+    Function: advisory_lock(name)
+        - Tries to take a PostgreSQL session-level advisory lock for the duration of a with block.
+"""
+import zlib
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def advisory_lock(name):
+    """
+    A function to try to take the PostgreSQL advisory lock named name without waiting, and to release
+    it when the with block ends. The lock belongs to the database session, so it is kept across the
+    transactions committed inside the block and released by PostgreSQL if the process dies.
+    On other databases no lock is taken and the block always runs.
+    args:
+    - name: The name of the lock; processes using the same name exclude each other
+    return:
+    - yields True when the lock was taken, False when another session holds it
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+    key = zlib.crc32(name.encode())
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
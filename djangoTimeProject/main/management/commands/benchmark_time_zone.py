@@ -0,0 +1,184 @@
+"""file: main/management/commands/benchmark_time_zone.py
+    This module is for benchmarking the time zone cron job
+    class: Command
+        - responsible for timing the row by row, batched, set-based and chunked time zone flips,
+          checking that each flip converts the times as convert_time does, and checking with EXPLAIN
+          that the cron queries use an index
+"""
+import re
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from main.constants import BULK_UPDATE_BATCH_SIZE, CRON_CHUNK_SIZE, CRON_THRESHOLD_MINUTES
+from main.cron import convert_time, flip_chunks, flip_time_zones, flip_time_zones_in_batches
+from main.models import TimeModel
+
+
+class Command(BaseCommand):
+    """A class to time the time zone flip of the cron job on a generated TimeModel table.
+
+    The rows are created inside a transaction that is rolled back at the end, so the benchmark
+    leaves the table as it found it. Before timing, one row in a hundred is left older than the cron
+    threshold, as between two runs of the cron job, and the plans of the cron queries are printed;
+    the command fails when a plan scans the whole table. One row in SAMPLE_STEP, alternating between
+    the time zones and spread over the year of the rows, is compared with convert_time after every
+    flip; the command also fails when a flip converts any of them differently.
+    """
+    SAMPLE_STEP = 97
+    help = 'Times the row by row, batched, set-based and chunked time zone flips on a generated TimeModel table'
+
+    def add_arguments(self, parser):
+        """
+        A function to declare the command line arguments of the benchmark
+        args:
+        - parser: The argument parser of the command
+        """
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Number of TimeModel rows to generate')
+        parser.add_argument('--sample', type=int, default=10_000,
+                            help='Number of rows flipped one by one to measure the row by row rate')
+        parser.add_argument('--batch-size', type=int, default=BULK_UPDATE_BATCH_SIZE,
+                            help='Number of rows per batch of the batched flip')
+        parser.add_argument('--chunk-size', type=int, default=CRON_CHUNK_SIZE,
+                            help='Number of rows per chunk of the chunked flip')
+
+    def handle(self, *args, **options):
+        """
+        A function to generate the rows, time each flip and print the rows flipped per second
+        args:
+        - options: The parsed command line arguments
+        """
+        with transaction.atomic():
+            self.__create_rows(options['rows'])
+            plans = self.__explain_cron_queries()
+            rates = {'row by row': self.__time_row_by_row(options['sample'])}
+            wrong = {}
+            self.__age_rows()
+            rates['batched'], wrong['batched'] = self.__check(self.__time_flip, flip_time_zones_in_batches,
+                                                              options['batch_size'])
+            if connection.vendor == 'postgresql':
+                self.__age_rows()
+                rates['set-based'], wrong['set-based'] = self.__check(self.__time_flip, flip_time_zones)
+            self.__age_rows()
+            rates['chunked'], wrong['chunked'] = self.__check(self.__time_chunks, options['chunk_size'])
+            transaction.set_rollback(True)
+
+        for name, plan in plans.items():
+            self.stdout.write(f'{name} plan:\n{plan}')
+        for name, (rows, seconds) in rates.items():
+            self.stdout.write(f'{name:>12}: {rows} rows in {seconds:.3f}s, {rows / seconds:,.0f} rows/s'
+                              + (f', {wrong[name]} of the sampled rows converted wrongly' if name in wrong else ''))
+        table_scans = [name for name, plan in plans.items()
+                       if 'Seq Scan' in plan or re.search(rf'\bSCAN {TimeModel._meta.db_table}\b(?! USING)', plan)]
+        if table_scans:
+            raise CommandError(f'The {", ".join(table_scans)} queries scan the whole table')
+        wrong_flips = [name for name, count in wrong.items() if count]
+        if wrong_flips:
+            raise CommandError(f'The {", ".join(wrong_flips)} flips convert times differently from convert_time')
+
+    def __create_rows(self, rows):
+        """
+        A function to create rows alternating between PKST and EST, spread evenly over 2024 so they
+        cross the daylight saving changes, all older than the cron threshold
+        args:
+        - rows: The number of rows to create
+        """
+        start = datetime(2024, 1, 1)
+        year_seconds = (datetime(2025, 1, 1) - start) // timedelta(seconds=1)
+        for offset in range(0, rows, BULK_UPDATE_BATCH_SIZE):
+            TimeModel.objects.bulk_create(
+                TimeModel(time=start + timedelta(seconds=index * year_seconds // rows),
+                          time_zone='PKST' if index % 2 else 'EST')
+                for index in range(offset, min(offset + BULK_UPDATE_BATCH_SIZE, rows)))
+        self.__age_rows()
+
+    @staticmethod
+    def __explain_cron_queries():
+        """
+        A function to leave one row in a hundred older than the cron threshold, refresh the planner
+        statistics and explain the queries of the cron job
+        return:
+        - a dictionary mapping query names to their plans
+        """
+        TimeModel.objects.update(updated_at=timezone.now())
+        old_time = timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES + 1)
+        TimeModel.objects.annotate(remainder=F('id') % 100).filter(remainder=0).update(updated_at=old_time)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {TimeModel._meta.db_table}')
+
+        pending = TimeModel.objects.filter(updated_at__lte=timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES))
+        return {
+            'pass': pending.explain(),
+            'chunk': pending.filter(id__gt=0).order_by('id').values_list('id', flat=True)[:CRON_CHUNK_SIZE].explain(),
+            'zone': pending.filter(time_zone='PKST').explain(),
+        }
+
+    def __check(self, timer, *args):
+        """
+        A function to time a flip and count the sampled rows it converted differently from convert_time
+        args:
+        - timer: The timing function of the flip, called with args
+        return:
+        - a tuple of the result of the timer and the number of sampled rows converted wrongly
+        """
+        sample = TimeModel.objects.annotate(remainder=F('id') % self.SAMPLE_STEP).filter(remainder=0)
+        expected = {time_id: convert_time(time, time_zone)
+                    for time_id, time, time_zone in sample.values_list('id', 'time', 'time_zone')}
+        result = timer(*args)
+        return result, sum(expected[time_id] != (time, time_zone)
+                           for time_id, time, time_zone in sample.values_list('id', 'time', 'time_zone'))
+
+    @staticmethod
+    def __age_rows():
+        """
+        A function to move updated_at of every row past the cron threshold, so the next flip takes them all
+        """
+        TimeModel.objects.update(updated_at=timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES + 1))
+
+    @staticmethod
+    def __time_row_by_row(sample):
+        """
+        A function to flip rows one save() at a time, as the cron job used to
+        args:
+        - sample: The number of rows to flip
+        return:
+        - a tuple of the number of rows flipped and the seconds it took
+        """
+        started = time.perf_counter()
+        for time_obj in TimeModel.objects.order_by('id')[:sample]:
+            time_obj.time, time_obj.time_zone = convert_time(time_obj.time, time_obj.time_zone)
+            time_obj.save()
+        return sample, time.perf_counter() - started
+
+    @staticmethod
+    def __time_flip(flip, *args):
+        """
+        A function to time a flip of every row
+        args:
+        - flip: The flip function, called with the rows older than the threshold and args
+        return:
+        - a tuple of the number of rows flipped and the seconds it took
+        """
+        started = time.perf_counter()
+        threshold_time = timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES)
+        flipped = flip(TimeModel.objects.filter(updated_at__lte=threshold_time), *args)
+        return flipped, time.perf_counter() - started
+
+    @staticmethod
+    def __time_chunks(chunk_size):
+        """
+        A function to time a flip of every row in chunks, as the cron job does. The chunks run in
+        savepoints of the benchmark's transaction instead of transactions of their own.
+        args:
+        - chunk_size: The number of rows per chunk
+        return:
+        - a tuple of the number of rows flipped and the seconds it took
+        """
+        started = time.perf_counter()
+        flipped, _ = flip_chunks(timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES), chunk_size=chunk_size)
+        return flipped, time.perf_counter() - started
@@ -0,0 +1,174 @@
+"""file: main/management/commands/flip_time_zones_parallel.py
+    This module is for flipping the time zones of the cron job with several processes
+    class: Command
+        - responsible for splitting the ids of the pending entries into shards, flipping each shard in a
+          process pool and printing the throughput and the correctness of every shard
+    Function: flip_shard(threshold_time, start_id, stop_id, chunk_size, check_step)
+        - Flips the pending entries of one shard in a worker process, on a connection of its own, and
+          checks a sample of them against convert_time.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from main.constants import CHANGE_TIME_ZONE_CHECKPOINT, CRON_CHUNK_SIZE, CRON_THRESHOLD_MINUTES
+from main.cron import convert_time, flip_chunks
+from main.locks import advisory_lock
+from main.models import TimeModel
+
+
+def flip_shard(threshold_time, start_id, stop_id, chunk_size, check_step):
+    """
+    A function to flip, in a worker process, the entries updated at or before threshold_time with an
+    id above start_id and up to stop_id. The worker opens its own database connection for the shard
+    and closes it when the shard is done. The pending entries whose id is a multiple of check_step
+    are converted with convert_time before the flip, and those flipped are compared with it after it.
+    args:
+    - threshold_time: Entries updated at or before this time are flipped
+    - start_id: Entries with this id or a lower one are left to other shards
+    - stop_id: Entries with an id above this one are left to other shards
+    - chunk_size: The number of entries flipped per transaction
+    - check_step: One entry in check_step is checked
+    return:
+    - a tuple of the number of entries flipped, the number of chunks that failed, the seconds the flip
+      took, the number of flipped entries checked and the number of them converted wrongly
+    """
+    try:
+        sample = TimeModel.objects.filter(updated_at__lte=threshold_time, id__gt=start_id, id__lte=stop_id)
+        sample = sample.annotate(remainder=F('id') % check_step).filter(remainder=0)
+        expected = {time_id: convert_time(old_time, time_zone)
+                    for time_id, old_time, time_zone in sample.values_list('id', 'time', 'time_zone')}
+        started = time.perf_counter()
+        flipped, failed_chunks = flip_chunks(threshold_time, start_id, chunk_size, stop_id=stop_id)
+        seconds = time.perf_counter() - started
+        checked = TimeModel.objects.filter(id__in=expected, updated_at__gt=threshold_time)
+        results = [expected[time_id] == (new_time, time_zone)
+                   for time_id, new_time, time_zone in checked.values_list('id', 'time', 'time_zone')]
+    finally:
+        connection.close()
+    return flipped, failed_chunks, seconds, len(results), results.count(False)
+
+
+class Command(BaseCommand):
+    """A class to flip the time zones of the entries left unchanged for CRON_THRESHOLD_MINUTES with
+    several processes, for tables too large for one process to flip within the cron interval.
+
+    The ids of the pending entries are split into shards of equal id ranges, more shards than workers
+    so a worker that finishes early takes the next shard. The workers are spawned rather than forked,
+    so none of them shares the database connection of the command; each flips its shards in chunks
+    of its own transactions with flip_chunks. While the workers run, the command holds the advisory
+    lock of the cron job, so change_time_zone skips its runs instead of competing for the same entries.
+    A shard that fails part way can simply be run again: the entries it flipped have a new updated_at
+    and are not flipped twice. Every worker also compares one entry in --check-step of its shard with
+    convert_time, and the command fails when any of them was converted differently.
+    """
+    help = 'Flips the time zones of the pending TimeModel entries in shards of ids, one worker process per core'
+
+    def add_arguments(self, parser):
+        """
+        A function to declare the command line arguments of the command
+        args:
+        - parser: The argument parser of the command
+        """
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes')
+        parser.add_argument('--shards', type=int, default=None,
+                            help='Number of id ranges the pending entries are split into, four per worker by default')
+        parser.add_argument('--chunk-size', type=int, default=CRON_CHUNK_SIZE,
+                            help='Number of entries flipped per transaction')
+        parser.add_argument('--check-step', type=int, default=100,
+                            help='One entry in this many of every shard is checked against convert_time')
+
+    def handle(self, *args, **options):
+        """
+        A function to split the pending entries into shards, flip them in a process pool and print the
+        entries flipped per second of every shard and of the whole run
+        args:
+        - options: The parsed command line arguments
+        """
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stderr.write('SQLite allows a single writer at a time, flipping with one worker.')
+            workers = 1
+        shard_count = options['shards'] or 4 * workers
+        if shard_count < 1:
+            raise CommandError('--shards must be at least 1')
+        if options['check_step'] < 1:
+            raise CommandError('--check-step must be at least 1')
+
+        with advisory_lock(CHANGE_TIME_ZONE_CHECKPOINT) as acquired:
+            if not acquired:
+                raise CommandError('The change_time_zone cron job is running, try again once it has finished.')
+            threshold_time = timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES)
+            shards = self.__split_shards(threshold_time, shard_count)
+            if not shards:
+                self.stdout.write('No entries to flip.')
+                return
+            started = time.perf_counter()
+            results = self.__flip_shards(threshold_time, shards, workers, options['chunk_size'],
+                                         options['check_step'])
+            seconds = time.perf_counter() - started
+
+        flipped, failed_chunks, _, checked, wrong = (sum(column) for column in zip(*results.values()))
+        self.stdout.write(f'Flipped {flipped} entries in {seconds:.3f}s, {flipped / seconds:,.0f} entries/s '
+                          f'with {workers} workers, {failed_chunks} chunks failed, '
+                          f'{wrong} of {checked} checked entries converted wrongly.')
+        if wrong:
+            raise CommandError(f'{wrong} checked entries were converted differently from convert_time')
+        if failed_chunks:
+            raise CommandError(f'{failed_chunks} chunks failed, run the command again to flip their entries')
+
+    @staticmethod
+    def __split_shards(threshold_time, shard_count):
+        """
+        A function to split the ids of the entries updated at or before threshold_time into ranges of
+        equal length
+        args:
+        - threshold_time: Entries updated at or before this time are flipped
+        - shard_count: The largest number of ranges
+        return:
+        - a list of (start_id, stop_id) tuples, each shard holding the ids above start_id up to stop_id
+        """
+        bounds = TimeModel.objects.filter(updated_at__lte=threshold_time).aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            return []
+        start_id = bounds['low'] - 1
+        shard_length = -(-(bounds['high'] - start_id) // shard_count)
+        return [(shard_start, min(shard_start + shard_length, bounds['high']))
+                for shard_start in range(start_id, bounds['high'], shard_length)]
+
+    def __flip_shards(self, threshold_time, shards, workers, chunk_size, check_step):
+        """
+        A function to flip the shards in a pool of spawned worker processes, printing the throughput and
+        the check of every shard as it finishes
+        args:
+        - threshold_time: Entries updated at or before this time are flipped
+        - shards: The (start_id, stop_id) tuples of the shards
+        - workers: The number of worker processes
+        - chunk_size: The number of entries flipped per transaction
+        - check_step: One entry in check_step of every shard is checked
+        return:
+        - a dictionary mapping each shard to the result of flip_shard
+        """
+        results = {}
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=django.setup) as executor:
+            futures = {executor.submit(flip_shard, threshold_time, start_id, stop_id, chunk_size, check_step):
+                       (start_id, stop_id) for start_id, stop_id in shards}
+            for future in as_completed(futures):
+                start_id, stop_id = futures[future]
+                flipped, failed_chunks, seconds, checked, wrong = results[start_id, stop_id] = future.result()
+                self.stdout.write(f'ids {start_id + 1} to {stop_id}: {flipped} entries in {seconds:.3f}s, '
+                                  f'{flipped / seconds:,.0f} entries/s, {failed_chunks} chunks failed, '
+                                  f'{wrong} of {checked} checked entries converted wrongly')
+        return results
@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timemodel',
+            index=models.Index(fields=['updated_at', 'time_zone'], name='time_updated_at_zone_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@
     This module is for defining the models for the main application
     class: TimeModel
         - responsible for the declaring a Time Model
+    class: CronCheckpoint
+        - responsible for declaring the progress of a chunked cron job
  """
 
 from django.db import models
@@ -15,6 +17,14 @@ class TimeModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        """A class to declare the indexes of the Time table.
+        The cron job looks up the entries left unchanged since a threshold time and flips them by
+        time zone, so (updated_at, time_zone) lets each minute's run read only those entries."""
+        indexes = [
+            models.Index(fields=['updated_at', 'time_zone'], name='time_updated_at_zone_idx'),
+        ]
+
     def __str__(self):
         """
         A function to return the string representation of the TimeModel
@@ -22,3 +32,21 @@ class TimeModel(models.Model):
         :rtype:
         """
         return f'{self.time} {self.time_zone}'
+
+
+class CronCheckpoint(models.Model):
+    """A class for declaring the model for the progress of a chunked cron job.
+    A pass of the job takes every entry updated before threshold_time, in primary key order; last_id is
+    the highest id of the last chunk committed. Both are cleared once the pass is complete."""
+    name = models.CharField(max_length=100, unique=True)
+    threshold_time = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        A function to return the string representation of the CronCheckpoint
+        :return:
+        :rtype:
+        """
+        return f'{self.name} {self.threshold_time} {self.last_id}'
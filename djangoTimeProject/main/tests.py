@@ -0,0 +1,95 @@
+"""file: main/tests.py
+    This module is for testing the time zone flips of the cron job
+    class: TimeEntriesMixin
+        - responsible for creating entries of both time zones and asserting which of them were flipped
+    class: FlipTimeZonesTests
+        - responsible for checking that every flip converts times as convert_time does
+    class: FlipShardTests
+        - responsible for checking the shard flip of the parallel command and its check
+"""
+from datetime import datetime, timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from main.constants import CRON_THRESHOLD_MINUTES
+from main.cron import convert_time, flip_chunks, flip_time_zones, flip_time_zones_in_batches
+from main.management.commands.flip_time_zones_parallel import flip_shard
+from main.models import TimeModel
+
+# Summer and winter times, and the times around the daylight saving changes of New York in 2024:
+# 02:30 on March 10 does not exist there and 01:30 on November 3 happens twice.
+TIMES = [datetime(2024, 1, 15, 10), datetime(2024, 7, 1, 23, 45), datetime(2024, 3, 10, 1, 59),
+         datetime(2024, 3, 10, 2, 30), datetime(2024, 3, 10, 3, 0), datetime(2024, 11, 3, 0, 59),
+         datetime(2024, 11, 3, 1, 30), datetime(2024, 11, 3, 2, 0), datetime(2024, 12, 31, 23, 59)]
+
+
+class TimeEntriesMixin:
+    """A class to create the entries of the flip tests and check them against convert_time"""
+
+    def setUp(self):
+        """
+        A function to create a PKST and an EST entry for every time of TIMES, older than the cron threshold
+        """
+        TimeModel.objects.bulk_create(TimeModel(time=time, time_zone=time_zone)
+                                      for time in TIMES for time_zone in ('PKST', 'EST'))
+        self.threshold_time = timezone.now() - timedelta(minutes=CRON_THRESHOLD_MINUTES)
+        TimeModel.objects.update(updated_at=self.threshold_time - timedelta(minutes=1))
+        self.original = {time_id: (time, time_zone)
+                         for time_id, time, time_zone in TimeModel.objects.values_list('id', 'time', 'time_zone')}
+
+    def assertFlipped(self, ids):
+        """
+        A function to assert that the entries of ids were flipped as convert_time does, and no other entry
+        args:
+        - ids: The ids of the entries expected to be flipped
+        """
+        for time_id, time, time_zone in TimeModel.objects.values_list('id', 'time', 'time_zone'):
+            original = self.original[time_id]
+            expected = convert_time(*original) if time_id in ids else original
+            self.assertEqual((time, time_zone), expected, f'entry {time_id} was {original}')
+
+
+class FlipTimeZonesTests(TimeEntriesMixin, TestCase):
+    """A class to check the flips of the cron job against convert_time, for both time zones"""
+
+    @skipUnless(connection.vendor == 'postgresql', 'AT TIME ZONE is only used on PostgreSQL')
+    def test_set_based_flip(self):
+        """
+        A function to check the single UPDATE of PostgreSQL
+        """
+        self.assertEqual(flip_time_zones(TimeModel.objects.all()), len(self.original))
+        self.assertFlipped(set(self.original))
+
+    def test_batched_flip(self):
+        """
+        A function to check the grouped UPDATEs of the other databases, with batches smaller than the table
+        """
+        self.assertEqual(flip_time_zones_in_batches(TimeModel.objects.all(), batch_size=5), len(self.original))
+        self.assertFlipped(set(self.original))
+
+    def test_chunked_flip_of_a_shard(self):
+        """
+        A function to check that flip_chunks flips the entries between last_id and stop_id only, once each
+        """
+        ids = sorted(self.original)
+        shard = ids[3:11]
+        flipped, failed_chunks = flip_chunks(self.threshold_time, ids[2], chunk_size=3, stop_id=ids[10])
+        self.assertEqual((flipped, failed_chunks), (len(shard), 0))
+        self.assertFlipped(set(shard))
+
+
+class FlipShardTests(TimeEntriesMixin, TransactionTestCase):
+    """A class to check flip_shard, whose worker closes its connection, so it runs outside the
+    transaction of a TestCase"""
+
+    def test_flip_shard(self):
+        """
+        A function to check that flip_shard flips its ids only and checks every flipped entry with check_step 1
+        """
+        ids = sorted(self.original)
+        flipped, failed_chunks, _, checked, wrong = flip_shard(self.threshold_time, ids[2], ids[10], 3, 1)
+        self.assertEqual((flipped, failed_chunks, checked, wrong), (8, 0, 8, 0))
+        self.assertFlipped(set(ids[3:11]))